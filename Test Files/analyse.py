@@ -19,9 +19,12 @@ Requirements: pip install numpy scipy matplotlib
 import sys
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import numpy as np
 from scipy.io import wavfile
 from scipy.signal import find_peaks
+from numpy.lib.stride_tricks import sliding_window_view
 import matplotlib.pyplot as plt
 
 # ---------------------------------------------------------------------------
@@ -43,6 +46,8 @@ DECODE_4FROM8 = [
     126,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0
 ]
 
+DECODE_TABLE = np.asarray(DECODE_4FROM8, dtype=np.int64)
+
 KNOWN_MSG        = "OOK48 TEST\r"   # for scoring only
 MSG_LEN          = len(KNOWN_MSG)
 SAMPLE_RATE      = 44100
@@ -51,6 +56,15 @@ FFT_LEN          = SAMPLES_PER_SYM
 TONE_FREQ        = 800
 TONE_BIN         = round(TONE_FREQ * FFT_LEN / SAMPLE_RATE)
 TONE_TOLERANCE   = 3
+WINDOW           = np.hanning(FFT_LEN)
+FFT_BATCH_CHARS  = 64    # characters per batched projection in get_symbol_magnitudes
+TONE_BINS        = np.arange(TONE_BIN - TONE_TOLERANCE, TONE_BIN + TONE_TOLERANCE + 1)
+
+# Windowed cos/sin basis for the tone bins only: x @ DFT_BASIS gives the
+# real and (negated) imaginary parts of rfft(x * WINDOW)[TONE_BINS]
+_DFT_PHASE       = 2 * np.pi * np.outer(np.arange(FFT_LEN), TONE_BINS) / FFT_LEN
+DFT_BASIS        = np.hstack((WINDOW[:, None] * np.cos(_DFT_PHASE),
+                              WINDOW[:, None] * np.sin(_DFT_PHASE)))
 MIN_MSG_LEN      = 3
 MAX_MSG_LEN      = 30
 
@@ -61,9 +75,6 @@ THRESH_SWEEP_STEP   = 0.01
 UNK_CODEWORD         = 0xF0    # spare 4-from-8 pattern (11110000) = uncertain
 UNK_CHAR             = '\x7e'  # displayed as ~ in serial stream as <UNK>
 
-print(f"FFT length: {FFT_LEN}  Tone bin: {TONE_BIN} ({TONE_BIN * SAMPLE_RATE / FFT_LEN:.1f} Hz)  "
-      f"Search range: bins {TONE_BIN-TONE_TOLERANCE}-{TONE_BIN+TONE_TOLERANCE}")
-
 # ---------------------------------------------------------------------------
 def find_clicks(click_ch, sample_rate):
     click_abs = np.abs(click_ch)
@@ -72,66 +83,81 @@ def find_clicks(click_ch, sample_rate):
     peaks, _  = find_peaks(click_abs, height=threshold, distance=min_dist)
     return peaks
 
-def symbol_magnitudes_allbins(tone_ch, start_sample):
-    end = start_sample + FFT_LEN
-    if end > len(tone_ch):
-        return None
-    window  = np.hanning(FFT_LEN)
-    segment = tone_ch[start_sample:end] * window
-    fft     = np.abs(np.fft.rfft(segment, n=FFT_LEN))
-    lo = TONE_BIN - TONE_TOLERANCE
-    hi = TONE_BIN + TONE_TOLERANCE + 1
-    return fft[lo:hi]
-
-def get_symbol_magnitudes(tone_ch, char_start):
-    """8 per-symbol magnitudes for one character, max across bins."""
-    n_bins = TONE_TOLERANCE * 2 + 1
-    cache  = np.zeros((8, n_bins))
-    for sym in range(8):
-        mags = symbol_magnitudes_allbins(tone_ch, char_start + sym * SAMPLES_PER_SYM)
-        if mags is not None:
-            cache[sym] = mags
-    return cache.max(axis=1)
-
-def decode_from_magnitudes(temp, use_confidence=True, confidence_threshold=CONFIDENCE_THRESHOLD):
+def get_symbol_magnitudes(tone_ch, char_starts):
+    """
+    Per-symbol magnitudes for every character, max across bins.
+    Only the 2*TONE_TOLERANCE+1 tone bins are ever used, so instead of a
+    full rfft each windowed symbol is projected onto DFT_BASIS - one BLAS
+    matmul per batch of FFT_BATCH_CHARS characters. Fills one contiguous
+    (chars, 8) array; symbols running past the end of the file stay zero.
     """
-    Pick 4 largest magnitudes, decode. Matches firmware exactly.
-    If use_confidence=True and confidence is below threshold, return UNK_CHAR.
-    Returns (char, bits, confidence)
+    starts   = np.asarray(char_starts, dtype=np.int64)[:, None] + np.arange(8) * SAMPLES_PER_SYM
+    if len(tone_ch) < FFT_LEN:
+        # Shorter than one window: no symbol fits, nothing to slide over
+        return np.zeros((len(starts), 8))
+    valid    = starts + FFT_LEN <= len(tone_ch)
+    index    = np.where(valid, starts, 0).ravel()
+    frames   = sliding_window_view(tone_ch, FFT_LEN)
+    raw_mags = np.zeros((len(starts), 8))
+    flat     = raw_mags.reshape(-1)
+    n_bins   = len(TONE_BINS)
+
+    # Projection scratch sized for one batch and reused by every batch; only
+    # the gathered segments themselves are allocated per batch
+    batch = FFT_BATCH_CHARS * 8
+    proj  = np.empty((batch, 2 * n_bins))
+    mags  = np.empty((batch, n_bins))
+    for b in range(0, index.size, batch):
+        k = min(batch, index.size - b)
+        np.matmul(frames[index[b:b + k]], DFT_BASIS, out=proj[:k])
+        np.hypot(proj[:k, :n_bins], proj[:k, n_bins:], out=mags[:k])
+        mags[:k].max(axis=1, out=flat[b:b + k])
+    raw_mags[~valid] = 0.0
+    return raw_mags
+
+def decode_batch(mags, use_confidence=True, confidence_threshold=CONFIDENCE_THRESHOLD):
     """
-    # Confidence: gap between 4th and 5th ranked magnitudes / full range
-    ranked     = np.sort(temp)[::-1]
-    gap        = ranked[3] - ranked[4]
-    rng        = ranked[0] - ranked[7]
-    confidence = gap / rng if rng > 0 else 0.0
-
-    bits      = [0] * 8
-    temp_copy = temp.copy()
-    for _ in range(4):
-        idx       = int(np.argmax(temp_copy))
-        bits[idx] = 1
-        temp_copy[idx] = 0
-
-    byte_val  = 0
-    for b in bits:
-        byte_val = (byte_val << 1) | b
-
-    if use_confidence and confidence < confidence_threshold:
-        return UNK_CHAR, bits, confidence
-
-    char_code = DECODE_4FROM8[byte_val] if byte_val < len(DECODE_4FROM8) else 0
-    char      = chr(char_code) if char_code > 0 else '?'
-    return char, bits, confidence
+    4-from-8 decode of an (N, 8) magnitude array; matches firmware exactly.
+    A stable descending argsort ranks every row at once (ties keep the lower
+    symbol index, like the firmware's repeated argmax), the top 4 are packed
+    with np.packbits and looked up in DECODE_TABLE. With use_confidence, rows
+    whose confidence is below the threshold decode to UNK_CHAR.
+    Rows with fewer than 4 nonzero magnitudes (e.g. the zero rows past the
+    end of the file) set only their nonzero bits plus bit 0: once the picks
+    are zeroed, the firmware's argmax keeps landing on symbol 0.
+    Returns (chars, bits, confidences) with bits as an (N, 8) uint8 array.
+    """
+    mags   = np.asarray(mags, dtype=np.float64)
+    order  = np.argsort(-mags, axis=1, kind='stable')
+    ranked = np.take_along_axis(mags, order, axis=1)
+
+    gap         = ranked[:, 3] - ranked[:, 4]
+    rng         = ranked[:, 0] - ranked[:, 7]
+    confidences = np.divide(gap, rng, out=np.zeros_like(gap), where=rng > 0)
+
+    bits = np.zeros(mags.shape, dtype=np.uint8)
+    np.put_along_axis(bits, order[:, :4], 1, axis=1)
+    short = (mags > 0).sum(axis=1) < 4
+    if short.any():
+        bits[short] &= (mags[short] > 0)
+        bits[short, 0] = 1
+    codes = DECODE_TABLE[np.packbits(bits, axis=1).ravel()]
+    codes = np.where(codes > 0, codes, ord('?'))
+    if use_confidence:
+        codes = np.where(confidences < confidence_threshold, ord(UNK_CHAR), codes)
+
+    chars = list(codes.astype(np.uint8).tobytes().decode('ascii'))
+    return chars, bits, confidences
 
 def find_phase(decoded_chars, msg_len):
     """Try all phases, return the one with most matches to KNOWN_MSG. Skips UNK."""
-    best_score, phase = -1, 0
-    for p in range(msg_len):
-        score = sum(1 for i, c in enumerate(decoded_chars)
-                    if c != UNK_CHAR and c == KNOWN_MSG[(i + p) % msg_len])
-        if score > best_score:
-            best_score, phase = score, p
-    return phase, best_score
+    codes    = np.array([ord(c) for c in decoded_chars], dtype=np.int32)
+    known    = np.array([ord(c) for c in KNOWN_MSG], dtype=np.int32)
+    # expected[p, i] = KNOWN_MSG[(i + p) % msg_len] for every phase at once
+    expected = known[(np.arange(len(codes))[None, :] + np.arange(msg_len)[:, None]) % msg_len]
+    scores   = ((codes[None, :] == expected) & (codes != ord(UNK_CHAR))).sum(axis=1)
+    phase    = int(np.argmax(scores))
+    return phase, int(scores[phase])
 
 def score_decodes(decoded_chars, phase, msg_len):
     correct = sum(1 for i, c in enumerate(decoded_chars)
@@ -146,9 +172,12 @@ def threshold_sweep(raw_mags, msg_len=MSG_LEN):
     unk_pct = []
     total_err_pct = []
 
+    # Decode once; each threshold only changes which characters become UNK
+    base_chars, _, confs = decode_batch(raw_mags, use_confidence=False)
+    base_chars = np.array(base_chars)
+
     for thr in thresholds:
-        chars = [decode_from_magnitudes(m, use_confidence=True, confidence_threshold=float(thr))[0]
-                 for m in raw_mags]
+        chars = np.where(confs < thr, UNK_CHAR, base_chars).tolist()
         phase, _ = find_phase(chars, msg_len)
         correct, scored, unk = score_decodes(chars, phase, msg_len)
         err = 1.0 - correct / scored if scored > 0 else 1.0
@@ -178,18 +207,24 @@ def detect_message_length(raw_mags, min_l=MIN_MSG_LEN, max_l=MAX_MSG_LEN, verbos
     n = len(raw_mags)
     scores = {}
 
+    # Unit-normalise every character once; zero-norm rows stay zero and are
+    # excluded from the pair count, as they would be skipped pairwise
+    mags    = np.asarray(raw_mags, dtype=np.float64)
+    norms   = np.linalg.norm(mags, axis=1)
+    nonzero = norms > 0
+    unit    = np.zeros_like(mags)
+    unit[nonzero] = mags[nonzero] / norms[nonzero, None]
+
+    # Wiener-Khinchin: summed autocorrelation of the 8 columns for every lag
+    # from one zero-padded rfft/irfft pair, plus the valid pair count per lag
+    nfft   = 2 * n
+    spec   = np.fft.rfft(unit, n=nfft, axis=0)
+    corrs  = np.fft.irfft((spec.real ** 2 + spec.imag ** 2).sum(axis=1), n=nfft)
+    ind    = np.fft.rfft(nonzero.astype(np.float64), n=nfft)
+    counts = np.rint(np.fft.irfft(ind.real ** 2 + ind.imag ** 2, n=nfft)).astype(np.int64)
+
     for L in range(min_l, min(max_l + 1, n // 2 + 1)):
-        corr = 0.0
-        count = 0
-        for i in range(n - L):
-            a = raw_mags[i]
-            b = raw_mags[i + L]
-            na = np.linalg.norm(a)
-            nb = np.linalg.norm(b)
-            if na > 0 and nb > 0:
-                corr += np.dot(a, b) / (na * nb)
-                count += 1
-        scores[L] = corr / count if count > 0 else 0.0
+        scores[L] = corrs[L] / counts[L] if counts[L] > 0 else 0.0
 
     # Normalise: subtract mean to expose the true signal above noise floor
     mean_score = np.mean(list(scores.values()))
@@ -224,28 +259,20 @@ def accumulate_and_decode(raw_mags, msg_len, n_acc):
     Phase-free: just fold modulo msg_len and sum.
     Returns list of decoded characters.
     """
+    mags = np.asarray(raw_mags, dtype=np.float64)
+    pos  = np.arange(len(mags)) % msg_len
+
     # Accumulate first n_acc * msg_len characters
-    limit       = n_acc * msg_len
+    limit       = min(n_acc * msg_len, len(mags))
     accumulated = np.zeros((msg_len, 8))
-    counts      = np.zeros(msg_len)
-
-    for i, mags in enumerate(raw_mags):
-        if i >= limit:
-            break
-        pos = i % msg_len
-        accumulated[pos] += mags
-        counts[pos] += 1
+    np.add.at(accumulated, pos[:limit], mags[:limit])
+    counts      = np.bincount(pos[:limit], minlength=msg_len)
 
     # Decode every character using the accumulated magnitudes for its position
-    decoded = []
-    for i, mags in enumerate(raw_mags):
-        pos = i % msg_len
-        if counts[pos] > 0:
-            acc_mag = accumulated[pos] / counts[pos]
-        else:
-            acc_mag = mags
-        char, _, _ = decode_from_magnitudes(acc_mag, use_confidence=False)
-        decoded.append(char)
+    # (positions never seen within the limit fall back to their own magnitudes)
+    have     = counts[pos] > 0
+    acc_mags = np.where(have[:, None], accumulated[pos] / np.maximum(counts[pos], 1)[:, None], mags)
+    decoded, _, _ = decode_batch(acc_mags, use_confidence=False)
 
     return decoded
 
@@ -261,8 +288,10 @@ def decode_file(filename, plot=True, verbose=True, max_accumulate=8):
         print("Error: need stereo file (ch0=GPS, ch1=tone)")
         return None
 
-    click_ch = data[:, 0].astype(np.float64)
-    tone_ch  = data[:, 1].astype(np.float64)
+    # One cast de-interleaves both channels into contiguous float32 rows.
+    # float32 is exact for 16-bit audio and halves the bytes scanned by
+    # find_clicks; the symbol projection still accumulates in float64
+    click_ch, tone_ch = np.ascontiguousarray(data[:, :2].T, dtype=np.float32)
 
     clicks = find_clicks(click_ch, sample_rate)
     if verbose:
@@ -272,18 +301,17 @@ def decode_file(filename, plot=True, verbose=True, max_accumulate=8):
         return None
 
     # Collect raw magnitude arrays
-    raw_mags = [get_symbol_magnitudes(tone_ch, int(c)) for c in clicks]
+    raw_mags = get_symbol_magnitudes(tone_ch, clicks)
 
     # Single pass decode
-    single_chars = [decode_from_magnitudes(m, use_confidence=True)[0] for m in raw_mags]
+    single_chars, single_bits, single_confs = decode_batch(raw_mags, use_confidence=True)
     phase_s, _   = find_phase(single_chars, MSG_LEN)
     correct_s, total_s, unk_s = score_decodes(single_chars, phase_s, MSG_LEN)
     single_err   = 1.0 - correct_s / total_s if total_s > 0 else 1.0
 
     if verbose:
         print(f"\n--- Single pass (confidence threshold={CONFIDENCE_THRESHOLD:.3f}) ---")
-        for i, (char, mags) in enumerate(zip(single_chars, raw_mags)):
-            _, bits, conf = decode_from_magnitudes(mags)
+        for i, (char, bits, conf) in enumerate(zip(single_chars, single_bits, single_confs)):
             display  = '<CR>' if char == '\r' else ('<UNK>' if char == UNK_CHAR else repr(char))
             expected = KNOWN_MSG[(i + phase_s) % MSG_LEN]
             ok       = '✓' if char == expected else ('~' if char == UNK_CHAR else '✗')
@@ -308,21 +336,6 @@ def decode_file(filename, plot=True, verbose=True, max_accumulate=8):
         for n, (c, t, e, u) in acc_results.items():
             print(f"{n:>8}  {c:>4}/{t:<4}  {u:>6}  {100*e:>7.1f}%")
 
-    # Check if detected_L is a multiple of the true length
-    # Prefer the smallest divisor that still gives a good autocorrelation score
-    # (handles the case where L=22 is detected instead of L=11)
-    best_L = detected_L
-    for divisor in range(2, detected_L):
-        if detected_L % divisor == 0:
-            candidate = detected_L // divisor
-            if candidate >= MIN_MSG_LEN:
-                # Check if this candidate also has a good score
-                if length_scores.get(candidate, 0) > 0.7 * length_scores[detected_L]:
-                    best_L = candidate
-                    break
-    if best_L != detected_L and verbose:
-        print(f"  Note: reducing detected L={detected_L} to L={best_L} (factor of original)")
-
     return {
         'file'         : filename,
         'clicks'       : len(clicks),
@@ -336,17 +349,22 @@ def decode_file(filename, plot=True, verbose=True, max_accumulate=8):
 
 # ---------------------------------------------------------------------------
 def main():
+    print(f"FFT length: {FFT_LEN}  Tone bin: {TONE_BIN} ({TONE_BIN * SAMPLE_RATE / FFT_LEN:.1f} Hz)  "
+          f"Search range: bins {TONE_BIN-TONE_TOLERANCE}-{TONE_BIN+TONE_TOLERANCE}")
+
     files = sys.argv[1:] if len(sys.argv) > 1 else ["OOK48Test.wav"]
     files = [f for f in files if os.path.exists(f)]
     if not files:
         print("No files found")
         return
 
-    results = []
-    for f in files:
-        r = decode_file(f, plot=False, verbose=(len(files) == 1))
-        if r:
-            results.append(r)
+    if len(files) == 1:
+        decoded = [decode_file(files[0], plot=False, verbose=True)]
+    else:
+        # Files are independent - decode them in parallel, results in input order
+        with ProcessPoolExecutor() as ex:
+            decoded = list(ex.map(partial(decode_file, plot=False, verbose=False), files))
+    results = [r for r in decoded if r]
 
     if not results:
         return
@@ -22,9 +22,11 @@ Requirements: pip install numpy scipy matplotlib
 import sys
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from scipy.io import wavfile
 from scipy.signal import find_peaks
+from numpy.lib.stride_tricks import sliding_window_view
 import matplotlib.pyplot as plt
 
 # ---------------------------------------------------------------------------
@@ -44,6 +46,8 @@ DECODE_4FROM8 = [
     126,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0
 ]
 
+DECODE_TABLE = np.asarray(DECODE_4FROM8, dtype=np.uint8)
+
 KNOWN_MSG        = "OOK48 TEST\r"
 MSG_LEN          = len(KNOWN_MSG)
 SAMPLE_RATE      = 44100
@@ -51,6 +55,12 @@ SAMPLES_PER_SYM  = 4900
 FFT_LEN          = SAMPLES_PER_SYM
 TONE_BIN         = round(800 * FFT_LEN / SAMPLE_RATE)
 TONE_TOLERANCE   = 3
+WINDOW           = np.hanning(FFT_LEN)
+FFT_BATCH_CHARS  = 64
+TONE_BINS        = np.arange(TONE_BIN - TONE_TOLERANCE, TONE_BIN + TONE_TOLERANCE + 1)
+_DFT_PHASE       = 2 * np.pi * np.outer(np.arange(FFT_LEN), TONE_BINS) / FFT_LEN
+DFT_BASIS        = np.hstack((WINDOW[:, None] * np.cos(_DFT_PHASE),
+                              WINDOW[:, None] * np.sin(_DFT_PHASE)))
 MIN_MSG_LEN      = 3
 MAX_MSG_LEN      = 30
 CURRENT_THRESHOLD = 0.180
@@ -62,52 +72,71 @@ def find_clicks(click_ch):
                             distance=int(SAMPLE_RATE*0.8))
     return peaks
 
-def get_symbol_magnitudes(tone_ch, char_start):
-    n_bins = TONE_TOLERANCE * 2 + 1
-    cache  = np.zeros((8, n_bins))
-    lo, hi = TONE_BIN - TONE_TOLERANCE, TONE_BIN + TONE_TOLERANCE + 1
-    for sym in range(8):
-        s = char_start + sym * SAMPLES_PER_SYM
-        if s + FFT_LEN > len(tone_ch): break
-        seg = tone_ch[s:s+FFT_LEN] * np.hanning(FFT_LEN)
-        fft = np.abs(np.fft.rfft(seg, n=FFT_LEN))
-        cache[sym] = fft[lo:hi]
-    return cache.max(axis=1)
-
-def decode_and_confidence(temp):
+def get_symbol_magnitudes(tone_ch, char_starts):
+    """(chars, 8) magnitudes, tone bins only via a windowed DFT-basis matmul."""
+    starts = np.asarray(char_starts, dtype=np.int64)[:, None] + np.arange(8) * SAMPLES_PER_SYM
+    if len(tone_ch) < FFT_LEN:
+        # Shorter than one window: no symbol fits, nothing to slide over
+        return np.zeros((len(starts), 8))
+    valid  = starts + FFT_LEN <= len(tone_ch)
+    index  = np.where(valid, starts, 0).ravel()
+    nb     = len(TONE_BINS)
+    frames = sliding_window_view(tone_ch, FFT_LEN)
+    mags   = np.zeros((len(starts), 8))
+    flat   = mags.reshape(-1)
+    # projection scratch reused across batches
+    batch  = FFT_BATCH_CHARS * 8
+    proj   = np.empty((batch, 2 * nb))
+    hyp    = np.empty((batch, nb))
+    for b in range(0, index.size, batch):
+        k = min(batch, index.size - b)
+        np.matmul(frames[index[b:b+k]], DFT_BASIS, out=proj[:k])
+        np.hypot(proj[:k, :nb], proj[:k, nb:], out=hyp[:k])
+        hyp[:k].max(axis=1, out=flat[b:b+k])
+    mags[~valid] = 0.0
+    return mags
+
+def decode_all(raw_mags):
     """
-    Decode from 8 magnitudes. Returns (char, confidence).
+    4-from-8 decode of an (N, 8) magnitude array, no UNK masking.
+    Rows with fewer than 4 nonzero magnitudes set their nonzero bits plus
+    bit 0, as the firmware's argmax-and-zero loop does.
     confidence = gap between 4th and 5th ranked magnitudes,
                  normalised by full range.
+    Returns (chars, confidences).
     """
-    ranked   = np.sort(temp)[::-1]   # descending
-    gap      = ranked[3] - ranked[4]
-    rng      = ranked[0] - ranked[7]
-    confidence = gap / rng if rng > 0 else 0.0
-
-    # Pick 4 largest
-    bits      = [0] * 8
-    temp_copy = temp.copy()
-    for _ in range(4):
-        idx       = int(np.argmax(temp_copy))
-        bits[idx] = 1
-        temp_copy[idx] = 0
-    byte_val = sum(b << (7-i) for i,b in enumerate(bits))
-    char_code = DECODE_4FROM8[byte_val] if byte_val < len(DECODE_4FROM8) else 0
-    char = chr(char_code) if char_code > 0 else '?'
-    return char, confidence
+    mags   = np.asarray(raw_mags, dtype=np.float64)
+    order  = np.argsort(-mags, axis=1, kind='stable')
+    ranked = np.take_along_axis(mags, order, axis=1)
+    gap    = ranked[:,3] - ranked[:,4]
+    rng    = ranked[:,0] - ranked[:,7]
+    confs  = np.divide(gap, rng, out=np.zeros_like(gap), where=rng > 0)
+
+    bits = np.zeros(mags.shape, dtype=np.uint8)
+    np.put_along_axis(bits, order[:,:4], 1, axis=1)
+    short = (mags > 0).sum(axis=1) < 4
+    if short.any():
+        bits[short] &= (mags[short] > 0)
+        bits[short, 0] = 1
+    codes = DECODE_TABLE[np.packbits(bits, axis=1).ravel()]
+    codes = np.where(codes > 0, codes, ord('?')).astype(np.uint8)
+    return list(codes.tobytes().decode('ascii')), confs
 
 def detect_length(raw_mags):
     n = len(raw_mags)
     scores = {}
+    mags = np.asarray(raw_mags, dtype=np.float64)
+    norms = np.linalg.norm(mags, axis=1)
+    nz = norms > 0
+    unit = np.zeros_like(mags)
+    unit[nz] = mags[nz] / norms[nz, None]
+    # All lags at once via FFT autocorrelation (Wiener-Khinchin)
+    spec = np.fft.rfft(unit, n=2*n, axis=0)
+    corrs = np.fft.irfft((spec.real**2 + spec.imag**2).sum(axis=1), n=2*n)
+    ind = np.fft.rfft(nz.astype(np.float64), n=2*n)
+    counts = np.rint(np.fft.irfft(ind.real**2 + ind.imag**2, n=2*n)).astype(np.int64)
     for L in range(MIN_MSG_LEN, min(MAX_MSG_LEN+1, n//2+1)):
-        corr, count = 0.0, 0
-        for i in range(n - L):
-            a, b = raw_mags[i], raw_mags[i+L]
-            na, nb = np.linalg.norm(a), np.linalg.norm(b)
-            if na > 0 and nb > 0:
-                corr += np.dot(a,b) / (na*nb); count += 1
-        scores[L] = corr/count if count > 0 else 0.0
+        scores[L] = corrs[L]/counts[L] if counts[L] > 0 else 0.0
     mean_s = np.mean(list(scores.values()))
     norm_s = {L: s-mean_s for L,s in scores.items()}
     best_L = max(norm_s, key=norm_s.get)
@@ -119,42 +148,35 @@ def detect_length(raw_mags):
     return best_L
 
 def find_phase(chars, msg_len):
-    best, phase = -1, 0
-    for p in range(msg_len):
-        s = sum(1 for i,c in enumerate(chars) if c == KNOWN_MSG[(i+p)%msg_len])
-        if s > best: best, phase = s, p
-    return phase
+    codes = np.array([ord(c) for c in chars], dtype=np.int32)
+    known = np.array([ord(c) for c in KNOWN_MSG], dtype=np.int32)
+    expected = known[(np.arange(len(codes))[None,:] + np.arange(msg_len)[:,None]) % msg_len]
+    return int(np.argmax((codes[None,:] == expected).sum(axis=1)))
 
 # ---------------------------------------------------------------------------
 def collect_confidences(filename):
     """Returns list of (snr_db, confidence, is_correct) tuples."""
     _, data = wavfile.read(filename)
     if data.ndim == 1: return []
-    click_ch = data[:,0].astype(np.float64)
-    tone_ch  = data[:,1].astype(np.float64)
+    click_ch, tone_ch = np.ascontiguousarray(data[:,:2].T, dtype=np.float32)
     clicks   = find_clicks(click_ch)
     if len(clicks) < MAX_MSG_LEN+1: return []
 
-    raw_mags = [get_symbol_magnitudes(tone_ch, int(c)) for c in clicks]
+    raw_mags = get_symbol_magnitudes(tone_ch, clicks)
     L        = detect_length(raw_mags)
 
     # Decode and collect confidence + correctness
-    chars  = []
-    confs  = []
-    for mags in raw_mags:
-        char, conf = decode_and_confidence(mags)
-        chars.append(char)
-        confs.append(conf)
+    chars, confs = decode_all(raw_mags)
 
     phase = find_phase(chars, MSG_LEN)
     m = re.search(r'SNR([+-]\d+)dB', os.path.basename(filename))
     snr_db = int(m.group(1)) if m else None
 
-    records = []
-    for i, (char, conf) in enumerate(zip(chars, confs)):
-        expected   = KNOWN_MSG[(i+phase) % MSG_LEN]
-        is_correct = (char == expected)
-        records.append((snr_db, conf, is_correct))
+    codes    = np.array([ord(c) for c in chars], dtype=np.int32)
+    known    = np.array([ord(c) for c in KNOWN_MSG], dtype=np.int32)
+    expected = known[(np.arange(len(codes)) + phase) % MSG_LEN]
+    correct  = codes == expected
+    records = [(snr_db, conf, ok) for conf, ok in zip(confs.tolist(), correct.tolist())]
     return records
 
 # ---------------------------------------------------------------------------
@@ -165,9 +187,11 @@ def main():
         return
 
     all_records = []
-    for f in files:
-        print(f"Processing {os.path.basename(f)}...")
-        all_records.extend(collect_confidences(f))
+    with ProcessPoolExecutor() as ex:
+        # ex.map yields in input order, so each line names the file it belongs to
+        for f, records in zip(files, ex.map(collect_confidences, files)):
+            print(f"Processing {os.path.basename(f)}...")
+            all_records.extend(records)
 
     if not all_records:
         return
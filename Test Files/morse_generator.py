@@ -32,6 +32,7 @@ Requirements:
 
 from __future__ import annotations
 
+import math
 import os
 import sys
 import wave
@@ -68,6 +69,22 @@ MORSE_MAP: Dict[str, str] = {
 }
 
 
+def _peak(x: np.ndarray) -> float:
+    # max/min reductions instead of an abs() copy of the whole buffer
+    return max(float(x.max()), -float(x.min()))
+
+
+def _seeded_rng(seed: int) -> np.random.Generator:
+    # SFC64 fills large Gaussian buffers faster than the default PCG64 and
+    # its statistical quality is ample for test noise
+    return np.random.Generator(np.random.SFC64(seed))
+
+
+def _rms(x: np.ndarray) -> float:
+    # norm() is a single BLAS nrm2/dot pass with no x*x temporary
+    return float(np.linalg.norm(x)) / math.sqrt(x.size)
+
+
 def dit_seconds(wpm: float) -> float:
     return 1.2 / wpm
 
@@ -111,50 +128,66 @@ def build_morse_key(
     segments.append((INTER_MESSAGE_GAP_UNITS * unit, False))
 
     if not segments:
-        return np.zeros(total_samples, dtype=np.float64)
-
-    key = np.zeros(total_samples, dtype=np.float64)
-    i = 0
-    while i < total_samples:
-        for seg_len_sec, is_on in segments:
-            seg_len = seg_len_sec
-            if timing_jitter_sigma > 0.0 and rng is not None:
+        return np.zeros(total_samples, dtype=np.float32)
+
+    if timing_jitter_sigma > 0.0 and rng is not None:
+        key = np.zeros(total_samples, dtype=np.float32)
+        i = 0
+        while i < total_samples:
+            for seg_len_sec, is_on in segments:
+                seg_len = seg_len_sec
                 factor = float(rng.normal(1.0, timing_jitter_sigma))
                 factor = min(1.8, max(0.5, factor))
                 seg_len *= factor
 
-            seg_n = max(1, int(round(seg_len * sample_rate)))
-            j = min(total_samples, i + seg_n)
-            if is_on:
-                key[i:j] = 1.0
-            i = j
-            if i >= total_samples:
-                break
+                seg_n = max(1, int(round(seg_len * sample_rate)))
+                j = min(total_samples, i + seg_n)
+                if is_on:
+                    key[i:j] = 1.0
+                i = j
+                if i >= total_samples:
+                    break
+    else:
+        # No jitter: every repeat of the message has the same segment sample
+        # counts, so tile one message's on/off states and expand them by
+        # their lengths in one pass instead of walking segment by segment
+        seg_ns = np.array([max(1, int(round(seg_len_sec * sample_rate)))
+                           for seg_len_sec, _ in segments])
+        seg_on = np.array([is_on for _, is_on in segments], dtype=np.float32)
+        reps = -(-total_samples // int(seg_ns.sum()))
+        key = np.repeat(np.tile(seg_on, reps), np.tile(seg_ns, reps))[:total_samples]
 
     fade_n = max(4, int(0.005 * sample_rate))
     if fade_n * 2 < total_samples:
-        window = np.ones(total_samples, dtype=np.float64)
-        ramp = np.linspace(0.0, 1.0, fade_n, endpoint=False)
+        # Linear fade-in after every on edge and fade-out before every off
+        # edge, applied to all edges at once through (edge, offset) index
+        # grids. np.multiply.at keeps the per-edge order if two ramps ever
+        # land on the same sample. key is 0/1 here, so scaling it directly
+        # equals building a separate window and multiplying it in.
+        ramp = np.linspace(0.0, 1.0, fade_n, endpoint=False, dtype=np.float32)
+        tail = np.linspace(1.0, 0.0, fade_n, endpoint=False, dtype=np.float32)
+        offs = np.arange(fade_n)
         edges = np.diff(np.concatenate(([0.0], key, [0.0])))
         on_edges = np.where(edges == 1.0)[0]
         off_edges = np.where(edges == -1.0)[0]
 
-        for start in on_edges:
-            end = min(total_samples, start + fade_n)
-            window[start:end] *= ramp[: end - start]
-        for stop in off_edges:
-            start = max(0, stop - fade_n)
-            tail = np.linspace(1.0, 0.0, stop - start, endpoint=False)
-            window[start:stop] *= tail
+        pos = on_edges[:, None] + offs
+        inside = pos < total_samples
+        np.multiply.at(key, pos[inside], np.broadcast_to(ramp, pos.shape)[inside])
 
-        key *= window
+        clipped = off_edges < fade_n  # fade-out cut short by the start of the file
+        for stop in off_edges[clipped]:
+            key[:stop] *= np.linspace(1.0, 0.0, stop, endpoint=False, dtype=np.float32)
+        pos = off_edges[~clipped, None] - fade_n + offs
+        np.multiply.at(key, pos.ravel(), np.broadcast_to(tail, pos.shape).ravel())
 
     return key
 
 
 def write_wav_mono_int16(path: str, samples: np.ndarray, sample_rate: int) -> None:
     clipped = np.clip(samples, -1.0, 1.0)
-    pcm = (clipped * 32767.0).astype(np.int16)
+    clipped *= 32767.0
+    pcm = clipped.astype(np.int16)
 
     with wave.open(path, "wb") as wf:
         wf.setnchannels(1)
@@ -174,31 +207,34 @@ def make_drifting_tone(
     from start_hz to end_hz over the duration of key.
 
     Uses cumulative-phase integration so phase is continuous even when
-    instantaneous frequency changes rapidly.
+    instantaneous frequency changes rapidly.  The phase is accumulated in
+    float64 (float32 cannot resolve it over a long file); the returned
+    tone is float32.
     """
     n = len(key)
-    t = np.arange(n, dtype=np.float64) / sample_rate
     # Instantaneous frequency at each sample
     inst_freq = np.linspace(start_hz, end_hz, n, dtype=np.float64)
     # Integrate phase (trapezoidal)
     phase = 2.0 * np.pi * np.cumsum(inst_freq) / sample_rate
-    return np.sin(phase) * key
+    tone = np.sin(phase).astype(np.float32)
+    tone *= key
+    return tone
 
 
 # QSB envelope profiles: (name, description, builder_fn)
-# Each builder takes (n_samples, sample_rate, rng) and returns a float64
+# Each builder takes (n_samples, sample_rate, rng) and returns a float32
 # amplitude envelope in [0, 1].  The envelope is multiplied onto the tone.
 
 def _qsb_slow_sine(n, sr, rng):
     """Gentle sine fade: one full cycle over the file, depth ~10dB."""
-    t = np.linspace(0, 2 * np.pi, n)
+    t = np.linspace(0, 2 * np.pi, n, dtype=np.float32)
     depth = 0.7  # amplitude ratio at trough (0.7 ≈ -3dB)
     return 0.5 * (1 + depth) + 0.5 * (1 - depth) * np.cos(t)
 
 def _qsb_multi_sine(n, sr, rng):
     """Multiple overlapping sine fades at different rates."""
-    t = np.arange(n) / sr
-    env = np.ones(n, dtype=np.float64)
+    t = np.arange(n, dtype=np.float32) / np.float32(sr)
+    env = np.ones(n, dtype=np.float32)
     for period, depth in [(8.0, 0.5), (15.0, 0.3), (30.0, 0.4)]:
         phase = rng.uniform(0, 2 * np.pi)
         env *= 1.0 - depth * 0.5 * (1 - np.cos(2 * np.pi * t / period + phase))
@@ -207,10 +243,13 @@ def _qsb_multi_sine(n, sr, rng):
 def _qsb_random_walk(n, sr, rng):
     """Slow random-walk fading, bandwidth ~0.1Hz."""
     # Generate low-pass noise via cumsum then normalise
-    steps = rng.normal(0, 1, n)
-    # Low-pass: smooth over ~1s
-    from scipy.ndimage import uniform_filter1d
-    smooth = uniform_filter1d(steps, size=int(sr * 1.5))
+    steps = rng.standard_normal(n, dtype=np.float32)
+    # Low-pass: smooth over ~1s with a centred box average (running-sum
+    # difference over a reflected-edge pad, as scipy's uniform_filter1d)
+    w = int(sr * 1.5)
+    padded = np.pad(steps, (w // 2, w - 1 - w // 2), mode="symmetric")
+    c = np.concatenate(([0.0], np.cumsum(padded, dtype=np.float64)))
+    smooth = ((c[w:] - c[:-w]) / w).astype(np.float32)
     smooth -= smooth.min()
     smooth /= smooth.max() + 1e-9
     # Map to amplitude range [0.1, 1.0]
@@ -218,15 +257,15 @@ def _qsb_random_walk(n, sr, rng):
 
 def _qsb_sudden_drop(n, sr, rng):
     """Signal drops 15dB for a few seconds then recovers."""
-    env = np.ones(n, dtype=np.float64)
+    env = np.ones(n, dtype=np.float32)
     drop_start = int(rng.uniform(0.2, 0.5) * n)
     drop_len   = int(rng.uniform(3, 8) * sr)
     fade       = int(0.3 * sr)
     drop_amp   = 10 ** (-15 / 20)  # -15dB
     env[drop_start: drop_start + drop_len] = drop_amp
     # Smooth transitions
-    ramp_dn = np.linspace(1.0, drop_amp, fade)
-    ramp_up = np.linspace(drop_amp, 1.0, fade)
+    ramp_dn = np.linspace(1.0, drop_amp, fade, dtype=np.float32)
+    ramp_up = np.linspace(drop_amp, 1.0, fade, dtype=np.float32)
     env[drop_start - fade: drop_start] = ramp_dn
     env[drop_start + drop_len: drop_start + drop_len + fade] = ramp_up
     return np.clip(env, 0.0, 1.0)
@@ -303,28 +342,33 @@ def main() -> None:
 
         # Use steady timing only for drift tests — we want to isolate the
         # frequency tracking variable, not mix in timing jitter
-        key_rng = np.random.default_rng(base_seed)
+        key_rng = _seeded_rng(base_seed)
         key = build_morse_key(message, SAMPLE_RATE, duration_sec, wpm,
                                timing_jitter_sigma=0.0, rng=key_rng)
-        tone_rms_raw = float(np.sqrt(np.mean(key * key)))  # key RMS as reference
+        tone_rms_raw = _rms(key)  # key RMS as reference
+
+        # One noise/mix buffer reused for every file
+        noise = np.empty(n, dtype=np.float32)
 
         for step_idx, drift_hz in enumerate(drift_values):
-            noise_rng = np.random.default_rng(base_seed + step_idx)
-            noise = noise_rng.normal(0.0, 1.0, n)
-            noise *= NOISE_RMS / float(np.sqrt(np.mean(noise * noise)))
+            noise_rng = _seeded_rng(base_seed + step_idx)
+            noise_rng.standard_normal(dtype=np.float32, out=noise)
+            noise *= NOISE_RMS / _rms(noise)
 
             # Tone sweeps from TONE_HZ to TONE_HZ + drift_hz
             tone = make_drifting_tone(key, SAMPLE_RATE,
                                        start_hz=TONE_HZ,
                                        end_hz=TONE_HZ + drift_hz)
 
-            tone_rms = float(np.sqrt(np.mean(tone * tone)))
+            tone_rms = _rms(tone)
             target_rms = NOISE_RMS * (10.0 ** (snr_db / 20.0))
             if tone_rms > 0:
-                tone = tone * (target_rms / tone_rms)
+                tone *= target_rms / tone_rms
 
-            mix = noise + tone
-            peak = float(np.max(np.abs(mix)))
+            # Mix in place in the noise buffer (not needed again this step)
+            mix = noise
+            mix += tone
+            peak = _peak(mix)
             if peak > PEAK_LIMIT:
                 mix *= PEAK_LIMIT / peak
 
@@ -343,14 +387,9 @@ def main() -> None:
     # QSB (fading) test mode
     # -----------------------------------------------------------------------
     if args.qsb:
-        try:
-            from scipy.ndimage import uniform_filter1d  # needed by qsb_walk
-        except ImportError:
-            pass  # qsb_walk will fail gracefully if scipy missing
-
         qsb_snr_list = [float(x) for x in args.qsb_snr_list.split(",")]
         n = int(SAMPLE_RATE * duration_sec)
-        t = np.arange(n, dtype=np.float64) / SAMPLE_RATE
+        t = np.arange(n, dtype=np.float64) / SAMPLE_RATE  # float64: tone phase
         base_seed = 48
 
         qsb_dir = os.path.join(out_dir, "qsb")
@@ -361,39 +400,46 @@ def main() -> None:
         print(f"SNR list: {qsb_snr_list}")
         print(f"Output dir: {qsb_dir}")
 
-        key_rng = np.random.default_rng(base_seed)
+        key_rng = _seeded_rng(base_seed)
         key = build_morse_key(message, SAMPLE_RATE, duration_sec, wpm,
                                timing_jitter_sigma=0.0, rng=key_rng)
-        base_tone = np.sin(2.0 * np.pi * TONE_HZ * t) * key
-        tone_rms_raw = float(np.sqrt(np.mean(base_tone * base_tone)))
+        base_tone = np.sin(2.0 * np.pi * TONE_HZ * t).astype(np.float32)
+        base_tone *= key
+        tone_rms_raw = _rms(base_tone)
+
+        # Noise/mix and faded-tone buffers reused for every file
+        noise = np.empty(n, dtype=np.float32)
+        tone_faded = np.empty(n, dtype=np.float32)
 
         for prof_idx, (prof_name, qsb_fn) in enumerate(QSB_PROFILES):
             for snr_idx, snr_db in enumerate(qsb_snr_list):
-                env_rng   = np.random.default_rng(base_seed + prof_idx * 100 + snr_idx)
-                noise_rng = np.random.default_rng(base_seed + 9999 + prof_idx * 100 + snr_idx)
+                env_rng   = _seeded_rng(base_seed + prof_idx * 100 + snr_idx)
+                noise_rng = _seeded_rng(base_seed + 9999 + prof_idx * 100 + snr_idx)
 
                 # Build QSB amplitude envelope
                 try:
                     qsb_env = qsb_fn(n, SAMPLE_RATE, env_rng)
                 except Exception as e:
                     print(f"  WARNING: {prof_name} failed ({e}), using flat envelope")
-                    qsb_env = np.ones(n, dtype=np.float64)
+                    qsb_env = np.ones(n, dtype=np.float32)
 
                 # Apply envelope to tone
-                tone_faded = base_tone * qsb_env
+                np.multiply(base_tone, qsb_env, out=tone_faded)
 
                 # Scale to target SNR (SNR defined relative to unfaded tone RMS
                 # so the *average* level matches; instantaneous SNR varies with fade)
-                tone_faded_rms = float(np.sqrt(np.mean(tone_faded * tone_faded)))
-                noise = noise_rng.normal(0.0, 1.0, n)
-                noise *= NOISE_RMS / float(np.sqrt(np.mean(noise * noise)))
+                tone_faded_rms = _rms(tone_faded)
+                noise_rng.standard_normal(dtype=np.float32, out=noise)
+                noise *= NOISE_RMS / _rms(noise)
 
                 target_rms = NOISE_RMS * (10.0 ** (snr_db / 20.0))
                 if tone_faded_rms > 0:
-                    tone_faded = tone_faded * (target_rms / tone_faded_rms)
+                    tone_faded *= target_rms / tone_faded_rms
 
-                mix = noise + tone_faded
-                peak = float(np.max(np.abs(mix)))
+                # Mix in place in the noise buffer (not needed again this step)
+                mix = noise
+                mix += tone_faded
+                peak = _peak(mix)
                 if peak > PEAK_LIMIT:
                     mix *= PEAK_LIMIT / peak
 
@@ -423,7 +469,10 @@ def main() -> None:
     )
 
     n = int(SAMPLE_RATE * duration_sec)
-    t = np.arange(n, dtype=np.float64) / SAMPLE_RATE
+    t = np.arange(n, dtype=np.float64) / SAMPLE_RATE  # float64: tone phase
+    # Only the key differs between profiles, so the carrier is built once
+    sin_wave = np.sin(2.0 * np.pi * TONE_HZ * t).astype(np.float32)
+    del t
 
     print(f"Generating Morse test set: {duration_sec}s, {TONE_HZ:.0f}Hz, {wpm:.1f}WPM")
     print(f"Message: {message}")
@@ -432,11 +481,16 @@ def main() -> None:
 
     base_seed = 48
 
+    # Tone, noise/mix and scaled-tone buffers reused for every file
+    tone = np.empty(n, dtype=np.float32)
+    noise = np.empty(n, dtype=np.float32)
+    tone_scaled = np.empty(n, dtype=np.float32)
+
     for profile_idx, (profile_name, timing_sigma) in enumerate(TIMING_PROFILES):
         profile_dir = os.path.join(out_dir, profile_name)
         os.makedirs(profile_dir, exist_ok=True)
 
-        key_rng = np.random.default_rng(base_seed + 1000 * profile_idx)
+        key_rng = _seeded_rng(base_seed + 1000 * profile_idx)
         key = build_morse_key(
             message,
             SAMPLE_RATE,
@@ -445,24 +499,26 @@ def main() -> None:
             timing_jitter_sigma=timing_sigma,
             rng=key_rng,
         )
-        tone = np.sin(2.0 * np.pi * TONE_HZ * t) * key
+        np.multiply(sin_wave, key, out=tone)
 
-        tone_rms_raw = np.sqrt(np.mean(tone * tone))
+        tone_rms_raw = _rms(tone)
         if tone_rms_raw <= 0:
             raise RuntimeError("Tone RMS is zero; message produced no keyed symbols.")
 
         print(f"\nProfile: {profile_name} (timing jitter sigma={timing_sigma:.2f})")
 
         for snr_idx, snr_db in enumerate(snr_db_list):
-            noise_rng = np.random.default_rng(base_seed + profile_idx * 100 + snr_idx)
-            noise = noise_rng.normal(0.0, 1.0, n)
-            noise *= NOISE_RMS / np.sqrt(np.mean(noise * noise))
+            noise_rng = _seeded_rng(base_seed + profile_idx * 100 + snr_idx)
+            noise_rng.standard_normal(dtype=np.float32, out=noise)
+            noise *= NOISE_RMS / _rms(noise)
 
             target_tone_rms = NOISE_RMS * (10.0 ** (snr_db / 20.0))
-            tone_scaled = tone * (target_tone_rms / tone_rms_raw)
 
-            mix = noise + tone_scaled
-            peak = float(np.max(np.abs(mix)))
+            # Add the scaled tone into the noise buffer in place
+            np.multiply(tone, target_tone_rms / tone_rms_raw, out=tone_scaled)
+            mix = noise
+            mix += tone_scaled
+            peak = _peak(mix)
             if peak > PEAK_LIMIT:
                 mix *= PEAK_LIMIT / peak
 
@@ -473,7 +529,7 @@ def main() -> None:
 
             print(
                 f"  wrote {profile_name}/{fn}  "
-                f"(tone_rms={target_tone_rms:.6f}, noise_rms={NOISE_RMS:.6f}, peak={np.max(np.abs(mix)):.3f})"
+                f"(tone_rms={target_tone_rms:.6f}, noise_rms={NOISE_RMS:.6f}, peak={_peak(mix):.3f})"
             )
 
     print("Done.")
@@ -6,6 +6,7 @@ Uses scikit-optimize (skopt) if available, falls back to random search.
 
 Install deps:
     pip install scikit-optimize numpy
+    pip install numba          # optional: JIT-compiles the inner decode loops
 
 Usage:
     python morse_optimiser.py [options]
@@ -19,6 +20,10 @@ Usage:
     --wpm-step     WPM search step (default: 0.25)
     --output       Where to write best params JSON (default: best_params.json)
     --jobs         Parallel workers for evaluation (default: 1; set to cpu count for speed)
+    --patience     Stop after this many calls without a --min-delta gain (default: 0 = off)
+    --min-delta    Best-score gain that counts as improvement (default: 0.1)
+    --acq-eps      Stop when the GP's expected improvement at its next point drops
+                   below this fraction of the best score (default: 0 = off)
 
 Parameters being optimised (11 total):
     schmitt_hyst        Schmitt trigger hysteresis fraction of dynamic range [0.02, 0.30]
@@ -41,14 +46,27 @@ import glob
 import json
 import os
 import re
+import struct
 import sys
 import time
-import wave
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
+try:
+    from numba import njit
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """Identity stand-in for numba.njit - kernels then run as plain Python."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
 # ---------------------------------------------------------------------------
 # Inline self-contained decoder — avoids import path issues when running
 # locally. Parameterised version of morse_decoder_v2.
@@ -72,77 +90,99 @@ def _dit_sec(wpm: float) -> float:
     return 1.2 / float(wpm)
 
 
-def _runs(binary: np.ndarray) -> List[Tuple[int, int]]:
-    if len(binary) == 0:
-        return []
-    vals = binary.astype(np.int8)
-    out: List[Tuple[int, int]] = []
-    cur = int(vals[0])
-    n = 1
-    for v in vals[1:]:
-        vi = int(v)
-        if vi == cur:
-            n += 1
+def _runs(binary: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Run-length encode binary as parallel (states int8, lengths int64) arrays."""
+    vals = np.ascontiguousarray(binary, dtype=np.int8)
+    if len(vals) == 0:
+        return np.empty(0, dtype=np.int8), np.empty(0, dtype=np.int64)
+    # Runs start at index 0 and wherever the value changes
+    edges = np.concatenate(([0], np.flatnonzero(np.diff(vals)) + 1, [len(vals)]))
+    return vals[edges[:-1]], np.diff(edges).astype(np.int64)
+
+
+@njit(cache=True)
+def _morph_pass(states, lengths, n, min_run, out_s, out_l):
+    """
+    One merge pass over the first n runs into out_s/out_l: each run shorter
+    than min_run is absorbed by its longer neighbour, then adjacent
+    same-state runs are joined. Returns (run count, whether anything merged).
+    """
+    m = 0
+    i = 0
+    changed = False
+    while i < n:
+        n_i = lengths[i]
+        if n_i < min_run and n > 1:
+            if i == 0:
+                out_s[m] = states[1]
+                out_l[m] = n_i + lengths[1]
+                m += 1
+                i += 2
+            elif i == n - 1 or out_l[m - 1] >= lengths[i + 1]:
+                out_l[m - 1] += n_i
+                i += 1
+            else:
+                out_s[m] = states[i + 1]
+                out_l[m] = n_i + lengths[i + 1]
+                m += 1
+                i += 2
+            changed = True
         else:
-            out.append((cur, n))
-            cur = vi
-            n = 1
-    out.append((cur, n))
-    return out
+            out_s[m] = states[i]
+            out_l[m] = n_i
+            m += 1
+            i += 1
+    k = 0
+    for j in range(m):
+        if k > 0 and out_s[k - 1] == out_s[j]:
+            out_l[k - 1] += out_l[j]
+        else:
+            out_s[k] = out_s[j]
+            out_l[k] = out_l[j]
+            k += 1
+    return k, changed
 
 
-def _morph_filter(run_list: List[Tuple[int, int]], min_run: int) -> List[Tuple[int, int]]:
-    if not run_list or min_run <= 1:
-        return run_list
+@njit(cache=True)
+def _morph_kernel(states, lengths, min_run, tmp_s, tmp_l):
+    """Repeat _morph_pass until stable; result left in states/lengths[:n]."""
+    n = states.size
     changed = True
-    runs = list(run_list)
     while changed:
-        changed = False
-        new_runs: List[Tuple[int, int]] = []
-        i = 0
-        while i < len(runs):
-            state, n = runs[i]
-            if n < min_run and len(runs) > 1:
-                if i == 0:
-                    ns, nn = runs[i + 1]
-                    new_runs.append((ns, n + nn))
-                    i += 2
-                elif i == len(runs) - 1:
-                    ps, pn = new_runs[-1]
-                    new_runs[-1] = (ps, pn + n)
-                    i += 1
-                else:
-                    ps, pn = new_runs[-1]
-                    ns, nn = runs[i + 1]
-                    if pn >= nn:
-                        new_runs[-1] = (ps, pn + n)
-                        i += 1
-                    else:
-                        new_runs.append((ns, n + nn))
-                        i += 2
-                changed = True
-            else:
-                new_runs.append((state, n))
-                i += 1
-        merged: List[Tuple[int, int]] = []
-        for s, n in new_runs:
-            if merged and merged[-1][0] == s:
-                merged[-1] = (s, merged[-1][1] + n)
-            else:
-                merged.append((s, n))
-        runs = merged
-    return runs
+        n, changed = _morph_pass(states, lengths, n, min_run, tmp_s, tmp_l)
+        states[:n] = tmp_s[:n]
+        lengths[:n] = tmp_l[:n]
+    return n
+
+
+def _morph_filter(states: np.ndarray, lengths: np.ndarray,
+                  min_run: int) -> Tuple[np.ndarray, np.ndarray]:
+    if states.size == 0 or min_run <= 1:
+        return states, lengths
+    states = states.copy()
+    lengths = lengths.copy()
+    n = _morph_kernel(states, lengths, min_run,
+                      np.empty_like(states), np.empty_like(lengths))
+    return states[:n], lengths[:n]
+
+
+@lru_cache(maxsize=None)
+def _hann(fft_len: int) -> np.ndarray:
+    """Hann window for the envelope STFT, built once per length (read-only)."""
+    window = np.hanning(fft_len)
+    window.flags.writeable = False
+    return window
 
 
 def _tone_envelope(samples: np.ndarray, sample_rate: int, tone_hz: float,
                    frame_rate: int, fft_len: int, tone_search_hz: float) -> np.ndarray:
-    x = samples.astype(np.float64)
+    x = samples
     if x.ndim != 1:
         x = x[:, 0]
     block = max(1, int(round(sample_rate / frame_rate)))
     n_blocks = len(x) // block
     if n_blocks <= 0:
-        return np.zeros(1, dtype=np.float64)
+        return np.zeros(1, dtype=np.float32)
     fft_len = max(256, fft_len)
     if fft_len % 2 != 0:
         fft_len += 1
@@ -152,24 +192,24 @@ def _tone_envelope(samples: np.ndarray, sample_rate: int, tone_hz: float,
     span_bins = max(1, int(round(tone_search_hz / freq_res)))
     search_lo = max(1, center_bin - span_bins)
     search_hi = min(fft_len // 2 - 1, center_bin + span_bins)
-    window = np.hanning(fft_len)
-    spec_rows = np.zeros((n_blocks, search_hi - search_lo + 1), dtype=np.float64)
-    for i in range(n_blocks):
-        c = i * block + (block // 2)
-        start = c - half
-        end = start + fft_len
-        seg = np.zeros(fft_len, dtype=np.float64)
-        src_lo = max(0, start)
-        src_hi = min(len(x), end)
-        dst_lo = src_lo - start
-        dst_hi = dst_lo + (src_hi - src_lo)
-        if src_hi > src_lo:
-            seg[dst_lo:dst_hi] = x[src_lo:src_hi]
-        spec = np.abs(np.fft.rfft(seg * window, n=fft_len))
-        spec_rows[i, :] = spec[search_lo:search_hi + 1]
+    window = _hann(fft_len)
+    spec_rows = np.zeros((n_blocks, search_hi - search_lo + 1), dtype=np.float32)
+    # Frame i is centred on i * block + block // 2, zero-filled where it runs
+    # off either end. Pad by half a frame each side and take every block-th
+    # window, then rfft the frames in chunks as one batched transform each
+    # (chunked so a long file never needs every frame in memory at once).
+    # Samples and spectra are float32, but the frames are padded into
+    # float64: numpy's float32 rfft is slower than its float64 one.
+    padded = np.concatenate((np.zeros(half), x, np.zeros(half)))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, fft_len)
+    frames = frames[block // 2::block][:n_blocks]
+    chunk = 1024
+    for i in range(0, n_blocks, chunk):
+        spec = np.abs(np.fft.rfft(frames[i:i + chunk] * window, n=fft_len, axis=1))
+        spec_rows[i:i + chunk, :] = spec[:, search_lo:search_hi + 1]
     col_peak = spec_rows.max(axis=0)
-    col_median = np.median(spec_rows, axis=0)
-    col_noise = np.percentile(spec_rows, 10.0, axis=0)
+    # Both order statistics from one introselect pass per column
+    col_noise, col_median = np.percentile(spec_rows, [10.0, 50.0], axis=0)
     snr_score = (col_peak - col_median) / (col_noise + 1e-9)
     best_idx = int(np.argmax(snr_score))
     env = spec_rows[:, best_idx]
@@ -179,34 +219,69 @@ def _tone_envelope(samples: np.ndarray, sample_rate: int, tone_hz: float,
     return np.clip(env, 0.0, 3.0)
 
 
+@njit(cache=True)
+def _schmitt_kernel(env, lo_thr, hi_thr, state, out):
+    """Schmitt-trigger env into out from the given starting state."""
+    for i in range(env.size):
+        v = env[i]
+        if state == 0 and v >= hi_thr:
+            state = 1
+        elif state == 1 and v <= lo_thr:
+            state = 0
+        out[i] = state
+
+
 def _binarize_schmitt(env: np.ndarray, hyst_frac: float) -> Tuple[np.ndarray, float]:
-    p20 = np.percentile(env, 20.0)
-    p80 = np.percentile(env, 80.0)
+    p20, p80 = np.percentile(env, [20.0, 80.0])
     mid = 0.5 * (p20 + p80)
     half_hyst = hyst_frac * (p80 - p20)
     lo_thr = mid - half_hyst
     hi_thr = mid + half_hyst
-    binary = np.zeros(len(env), dtype=np.int8)
-    state = 1 if env[0] >= mid else 0
-    for i, v in enumerate(env):
-        if state == 0 and v >= hi_thr:
-            state = 1
-        elif state == 1 and v <= lo_thr:
-            state = 0
-        binary[i] = state
+    state0 = 1 if env[0] >= mid else 0
+    if not hi_thr > lo_thr:
+        # Degenerate band: a sample on the threshold toggles the state,
+        # which only the sequential walk reproduces
+        binary = np.zeros(len(env), dtype=np.int8)
+        _schmitt_kernel(env, lo_thr, hi_thr, state0, binary)
+        return binary, float(mid)
+    # Outside the hysteresis band the output is fixed by the sample alone;
+    # inside it holds the last decided value. Mark the decided samples, then
+    # forward-fill each sample from the latest decided index at or before it.
+    decided = np.full(len(env), -1, dtype=np.int8)
+    decided[env >= hi_thr] = 1
+    decided[env <= lo_thr] = 0
+    last = np.where(decided >= 0, np.arange(len(env)), -1)
+    np.maximum.accumulate(last, out=last)
+    binary = np.where(last >= 0, decided[last], np.int8(state0)).astype(np.int8)
     return binary, float(mid)
 
 
-def _estimate_wpm(run_list, frame_rate, wpm_min, wpm_max, wpm_step,
-                  space_word_weight, space_letter_weight, hist_reward, hist_tol):
-    mark_runs = [n for s, n in run_list if s == 1 and n >= 2]
-    best_wpm = float(wpm_min)
+@njit(cache=True)
+def _estimate_wpm_core(states, lengths, unit_grid, sww, slw, hr, htol):
+    """
+    Unit-length grid search over parallel run state/length arrays.
+    Returns (index into unit_grid of the best score or -1, best score).
+    The mark-run histogram count shares the single pass over the runs.
+    """
+    n_marks = 0
+    for j in range(states.size):
+        if states[j] == 1 and lengths[j] >= 2:
+            n_marks += 1
+    best_idx = -1
     best_score = -1e9
-    for wpm in np.arange(wpm_min, wpm_max + 1e-9, wpm_step):
-        unit_frames = max(1, int(round(_dit_sec(float(wpm)) * frame_rate)))
+    for wi in range(unit_grid.size):
+        unit_frames = unit_grid[wi]
+        dit_tol_f = htol * unit_frames
+        dash_frames = 3 * unit_frames
         total_weight = 0.0
         penalty = 0.0
-        for state, n in run_list:
+        hits = 0
+        for j in range(states.size):
+            state = states[j]
+            n = lengths[j]
+            if state == 1 and n >= 2:
+                if abs(n - unit_frames) <= dit_tol_f or abs(n - dash_frames) <= dit_tol_f:
+                    hits += 1
             units = n / unit_frames
             if units < 0.5:
                 continue
@@ -217,40 +292,82 @@ def _estimate_wpm(run_list, frame_rate, wpm_min, wpm_max, wpm_step,
             else:
                 if units >= 6.0:
                     err = abs(units - 7.0)
-                    tw = space_word_weight
+                    tw = sww
                 else:
                     err = min(abs(units - 1.0), abs(units - 3.0))
-                    tw = space_letter_weight
+                    tw = slw
             penalty += weight * tw * err
             total_weight += weight * tw
         if total_weight <= 1e-9:
             continue
         mean_err = penalty / total_weight
-        dit_tol_f = hist_tol * unit_frames
-        dash_frames = 3 * unit_frames
-        hist_score = sum(
-            1 for n in mark_runs
-            if abs(n - unit_frames) <= dit_tol_f or abs(n - dash_frames) <= dit_tol_f
-        )
-        hist_frac = hist_score / max(1, len(mark_runs))
-        score = -mean_err + hist_reward * hist_frac
+        hist_frac = hits / max(1, n_marks)
+        score = -mean_err + hr * hist_frac
         if score > best_score:
             best_score = score
-            best_wpm = float(wpm)
+            best_idx = wi
+    return best_idx, best_score
+
+
+def _estimate_wpm_np(states, lengths, unit_grid, sww, slw, hr, htol):
+    """
+    numpy twin of _estimate_wpm_core for when numba is not installed: every
+    (unit length, run) pair is scored at once as a 2-D array.
+    """
+    uf = unit_grid[:, None].astype(np.float64)
+    n = lengths[None, :].astype(np.float64)
+    is_mark = states == 1
+    marks = n[:, is_mark & (lengths >= 2)]
+    tol = htol * uf
+    hits = ((np.abs(marks - uf) <= tol) | (np.abs(marks - 3.0 * uf) <= tol)).sum(axis=1)
+
+    units = n / uf
+    word = ~is_mark & (units >= 6.0)
+    err = np.where(word, np.abs(units - 7.0),
+                   np.minimum(np.abs(units - 1.0), np.abs(units - 3.0)))
+    tw = np.where(is_mark, 1.0, np.where(word, sww, slw))
+    w = np.where(units >= 0.5, np.minimum(n, 10.0 * uf), 0.0) * tw
+    penalty = (w * err).sum(axis=1)
+    total_weight = w.sum(axis=1)
+
+    valid = total_weight > 1e-9
+    if not valid.any():
+        return -1, -1e9
+    mean_err = penalty / np.where(valid, total_weight, 1.0)
+    scores = np.where(valid, -mean_err + hr * (hits / max(1, marks.shape[1])), -np.inf)
+    best_idx = int(np.argmax(scores))
+    return best_idx, float(scores[best_idx])
+
+
+def _estimate_wpm(states, lengths, frame_rate, wpm_min, wpm_max, wpm_step,
+                  space_word_weight, space_letter_weight, hist_reward, hist_tol):
+    wpms = np.arange(wpm_min, wpm_max + 1e-9, wpm_step, dtype=np.float64)
+    # The score depends on wpm only through the integer unit length, and
+    # neighbouring grid points mostly round to the same one. Score each unit
+    # length once, in grid order, and report the first wpm that produced it
+    # so ties resolve exactly as a full sweep would.
+    unit_frames = np.maximum(1, np.round(1.2 / wpms * frame_rate).astype(np.int64))
+    first = np.sort(np.unique(unit_frames, return_index=True)[1])
+    core = _estimate_wpm_core if _HAVE_NUMBA else _estimate_wpm_np
+    best_idx, best_score = core(
+        states, lengths, unit_frames[first], float(space_word_weight), float(space_letter_weight),
+        float(hist_reward), float(hist_tol),
+    )
+    best_wpm = float(wpms[first[best_idx]]) if best_idx >= 0 else float(wpm_min)
     return best_wpm, best_score
 
 
-def _decode(binary, wpm, frame_rate, alpha_mark, alpha_space, pll_lo, pll_hi, word_gap_thr, morph_thresh):
+def _decode(states, lengths, wpm, frame_rate, alpha_mark, alpha_space, pll_lo, pll_hi,
+            word_gap_thr, morph_thresh):
     unit_frames = max(1, int(round(_dit_sec(wpm) * frame_rate)))
-    run_list = _runs(binary)
     min_run = max(2, int(round(morph_thresh * unit_frames)))
-    run_list = _morph_filter(run_list, min_run)
+    states, lengths = _morph_filter(states, lengths, min_run)
     symbols: List[str] = []
     current = ""
     unit_est = float(unit_frames)
     unit_min = pll_lo * unit_frames
     unit_max = pll_hi * unit_frames
-    for state, n in run_list:
+    for state, n in zip(states.tolist(), lengths.tolist()):
         if unit_est <= 1e-6:
             unit_est = float(unit_frames)
         units_f = n / unit_est
@@ -292,35 +409,101 @@ def _decode(binary, wpm, frame_rate, alpha_mark, alpha_space, pll_lo, pll_hi, wo
     return "".join(chars).strip()
 
 
+# Tone envelope per WAV path. Nothing the optimiser varies affects the
+# envelope, so each file's STFT is done once per process, not per call.
+_ENV_CACHE: Dict[str, Optional[np.ndarray]] = {}
+
+
+def _wav_int16(path: str) -> Tuple[Optional[np.ndarray], int]:
+    """
+    Channel 0 of a 16-bit PCM WAV as a read-only memory-mapped int16 view,
+    with its sample rate. The view is None for other sample widths.
+    """
+    with open(path, "rb") as f:
+        head = f.read(12)
+        if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+            raise ValueError(f"{path}: not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"{path}: no data chunk")
+            chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if chunk_id == b"data":
+                break
+            body = f.read(size + (size & 1))  # chunks are word-aligned
+            if chunk_id == b"fmt ":
+                fmt = body
+        if fmt is None or len(fmt) < 16:
+            raise ValueError(f"{path}: missing fmt chunk")
+        tag, ch, sr, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if tag not in (1, 0xFFFE):  # PCM, or WAVE_FORMAT_EXTENSIBLE
+            raise ValueError(f"{path}: unsupported WAV format tag {tag}")
+        offset = f.tell()
+        size = min(size, os.fstat(f.fileno()).st_size - offset)
+    frames = size // (ch * 2)
+    if bits != 16 or frames == 0:
+        return (np.zeros(0, dtype=np.int16) if bits == 16 else None), sr
+    data = np.memmap(path, dtype=np.int16, mode="r", offset=offset, shape=(frames * ch,))
+    return data[::ch], sr
+
+
+def load_envelope(path: str) -> Optional[np.ndarray]:
+    """Tone envelope of a WAV file (cached), or None if it is not 16-bit PCM."""
+    if path in _ENV_CACHE:
+        return _ENV_CACHE[path]
+    try:
+        samples, sr = _wav_int16(path)
+    except ValueError:
+        # Not a WAV we can read: decodes to nothing and scores as a miss
+        samples, sr = None, 0
+    env = None
+    if samples is not None:
+        # The only copy of the audio: channel 0, converted straight to float32
+        data = samples.astype(np.float32) * np.float32(1.0 / 32768.0)
+        env = _tone_envelope(data, sr, 800.0, 200, 2048, 120.0)
+    _ENV_CACHE[path] = env
+    return env
+
+
+def preload_envelopes(paths: List[str]) -> None:
+    """Fill the envelope cache for every path; unreadable files cache as None."""
+    for path in paths:
+        try:
+            load_envelope(path)
+        except Exception:
+            _ENV_CACHE[path] = None
+
+
+def _seed_env_cache(cache: Dict[str, Optional[np.ndarray]]) -> None:
+    """Worker initialiser: start each pool process with the parent's envelopes."""
+    _ENV_CACHE.update(cache)
+
+
 def decode_file(path: str, params: dict, wpm_min: float, wpm_max: float, wpm_step: float) -> str:
-    with wave.open(path, "rb") as wf:
-        ch = wf.getnchannels()
-        sw = wf.getsampwidth()
-        sr = wf.getframerate()
-        n = wf.getnframes()
-        raw = wf.readframes(n)
-    if sw != 2:
+    env = load_envelope(path)
+    if env is None:
         return ""
-    data = np.frombuffer(raw, dtype=np.int16).astype(np.float64) / 32768.0
-    if ch > 1:
-        data = data.reshape(-1, ch)[:, 0]
+    return decode_envelope(env, params, wpm_min, wpm_max, wpm_step)
+
 
-    env = _tone_envelope(data, sr, 800.0, 200, 2048, 120.0)
+def decode_envelope(env: np.ndarray, params: dict,
+                    wpm_min: float, wpm_max: float, wpm_step: float) -> str:
     binary, _ = _binarize_schmitt(env, params["schmitt_hyst"])
-    run_list = _runs(binary)
+    states, lengths = _runs(binary)
 
     # Coarse morph filter for WPM estimator
     coarse_unit = max(1, int(round(_dit_sec(0.5 * (wpm_min + wpm_max)) * 200)))
     min_run_coarse = max(2, int(round(params["morph_thresh"] * coarse_unit)))
-    filtered = _morph_filter(run_list, min_run_coarse)
+    f_states, f_lengths = _morph_filter(states, lengths, min_run_coarse)
 
     est_wpm, _ = _estimate_wpm(
-        filtered, 200, wpm_min, wpm_max, wpm_step,
+        f_states, f_lengths, 200, wpm_min, wpm_max, wpm_step,
         params["space_word_weight"], params["space_letter_weight"],
         params["hist_reward"], params["hist_tol"],
     )
     return _decode(
-        binary, est_wpm, 200,
+        states, lengths, est_wpm, 200,
         params["alpha_mark"], params["alpha_space"],
         params["pll_lo"], params["pll_hi"],
         params["word_gap_thr"], params["morph_thresh"],
@@ -334,23 +517,34 @@ def decode_file(path: str, params: dict, wpm_min: float, wpm_max: float, wpm_ste
 KNOWN_TEXT = "CQ CQ DE OOK48 TEST K"
 
 
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+@lru_cache(maxsize=None)
+def _rotations(known: str) -> np.ndarray:
+    """(len, len) code points of every cyclic rotation of known (read-only)."""
+    k = _codepoints(known)
+    rot = np.stack([np.roll(k, -p) for p in range(k.size)])
+    rot.flags.writeable = False
+    return rot
+
+
 def score_text(decoded: str, known: str = KNOWN_TEXT) -> float:
     d = (decoded or "").strip().upper()
     k = (known or "").strip().upper()
     if not d or not k:
         return 0.0
     klen = len(k)
-    blocks = [d[i:i + klen] for i in range(0, len(d), klen)]
-    wm, wt = 0, 0
-    for blk in blocks:
-        n = len(blk)
-        best = max(
-            sum(1 for a, b in zip(blk, (k[p:] + k[:p])[:n]) if a == b)
-            for p in range(klen)
-        )
-        wm += best
-        wt += n
-    return 100.0 * wm / wt if wt else 0.0
+    # Split d into klen-long blocks, padding the last with a value that is
+    # never a code point, and count each block's matches against every
+    # rotation of k at once; each block keeps its best rotation.
+    n_blocks = -(-len(d) // klen)
+    blocks = np.full(n_blocks * klen, 0xFFFFFFFF, dtype=np.uint32)
+    blocks[:len(d)] = _codepoints(d)
+    blocks = blocks.reshape(n_blocks, 1, klen)
+    wm = int((blocks == _rotations(k)).sum(axis=2).max(axis=1).sum())
+    return 100.0 * wm / len(d)
 
 
 def parse_snr(name: str) -> float:
@@ -412,25 +606,67 @@ def compute_objective(scores_by_profile: Dict[str, List[float]],
 # Main evaluation function
 # ---------------------------------------------------------------------------
 
-def evaluate(params: dict, files: List[str], target_profiles: List[str],
-             objective: str, wpm_min: float, wpm_max: float, wpm_step: float) -> float:
-    scores_by_profile: Dict[str, List[float]] = {}
-    snrs_by_profile: Dict[str, List[float]] = {}
+def score_envelope(env: Optional[np.ndarray], params: dict,
+                   wpm_min: float, wpm_max: float, wpm_step: float) -> float:
+    """Decode one file's envelope and score it; a failed decode scores 0."""
+    if env is None:
+        return 0.0
+    try:
+        return score_text(decode_envelope(env, params, wpm_min, wpm_max, wpm_step))
+    except Exception:
+        return 0.0
+
+
+def score_file(path: str, params: dict, wpm_min: float, wpm_max: float, wpm_step: float) -> float:
+    """score_envelope for a file, via this process's envelope cache."""
+    try:
+        env = load_envelope(path)
+    except Exception:
+        env = None
+    return score_envelope(env, params, wpm_min, wpm_max, wpm_step)
 
-    for path in files:
-        prof = parse_profile(path)
-        if prof not in target_profiles:
-            continue
-        snr = parse_snr(os.path.basename(path))
-        try:
-            decoded = decode_file(path, params, wpm_min, wpm_max, wpm_step)
-            sc = score_text(decoded)
-        except Exception:
-            sc = 0.0
-        scores_by_profile.setdefault(prof, []).append(sc)
-        snrs_by_profile.setdefault(prof, []).append(snr)
 
-    return compute_objective(scores_by_profile, snrs_by_profile, objective, target_profiles)
+def evaluate(params: dict, files: List[str], target_profiles: List[str],
+             objective: str, wpm_min: float, wpm_max: float, wpm_step: float,
+             pool: Optional[ProcessPoolExecutor] = None) -> float:
+    return evaluate_batch([params], files, target_profiles, objective,
+                          wpm_min, wpm_max, wpm_step, pool)[0]
+
+
+def evaluate_batch(params_list: List[dict], files: List[str], target_profiles: List[str],
+                   objective: str, wpm_min: float, wpm_max: float, wpm_step: float,
+                   pool: Optional[ProcessPoolExecutor] = None) -> List[float]:
+    """Objective for each parameter set; all (params, file) decodes share the pool."""
+    selected = [(path, parse_profile(path)) for path in files]
+    selected = [(path, prof) for path, prof in selected if prof in target_profiles]
+
+    # Envelopes are computed once and cached; pool workers are seeded with
+    # the cache when they start, so tasks only carry a path and the params.
+    paths = [path for path, _ in selected]
+    preload_envelopes(paths)
+
+    # Decodes are independent, so with a pool every (params, file) pair of
+    # the batch runs in parallel. Scores are slotted back by index so the
+    # aggregation order stays fixed.
+    tasks = [(params, path) for params in params_list for path in paths]
+    if pool is None:
+        scores = [score_file(path, params, wpm_min, wpm_max, wpm_step) for params, path in tasks]
+    else:
+        scores = [0.0] * len(tasks)
+        futures = {pool.submit(score_file, path, params, wpm_min, wpm_max, wpm_step): i
+                   for i, (params, path) in enumerate(tasks)}
+        for fut in as_completed(futures):
+            scores[futures[fut]] = fut.result()
+
+    results = []
+    for b in range(len(params_list)):
+        scores_by_profile: Dict[str, List[float]] = {}
+        snrs_by_profile: Dict[str, List[float]] = {}
+        for (path, prof), sc in zip(selected, scores[b * len(paths):(b + 1) * len(paths)]):
+            scores_by_profile.setdefault(prof, []).append(sc)
+            snrs_by_profile.setdefault(prof, []).append(parse_snr(os.path.basename(path)))
+        results.append(compute_objective(scores_by_profile, snrs_by_profile, objective, target_profiles))
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -487,9 +723,12 @@ def run_optimisation(
     wpm_step: float,
     output_path: str,
     jobs: int = 1,
+    patience: int = 0,
+    min_delta: float = 0.1,
+    acq_eps: float = 0.0,
 ) -> dict:
     try:
-        from skopt import gp_minimize
+        from skopt import Optimizer
         from skopt.space import Real
         USE_BAYES = True
         print("Using Bayesian optimisation (scikit-optimize)")
@@ -502,11 +741,51 @@ def run_optimisation(
     best_params = vec_to_params(V2_DEFAULTS)
     iteration = [0]
     t0 = time.time()
-
-    def objective_fn(vec):
+    # Plateau tracking: best score seen and calls since it last rose by min_delta
+    plateau_best = -1e9
+    no_improve = 0
+
+    # Compute every envelope up front, then start one worker pool for the
+    # whole run with the cache copied in, so neither process start-up nor
+    # file decoding is repeated per iteration.
+    preload_envelopes([path for path in files if parse_profile(path) in target_profiles])
+    pool = (ProcessPoolExecutor(max_workers=jobs, initializer=_seed_env_cache,
+                                initargs=(dict(_ENV_CACHE),))
+            if jobs > 1 else None)
+
+    # Scores by exact point. The GP does re-propose points it has already
+    # evaluated (typically pinned to a bound), and the decode is
+    # deterministic, so those cost nothing. Points are not rounded: nearby
+    # parameters can still decode differently.
+    seen: Dict[Tuple[float, ...], float] = {}
+
+    def objective_batch(vecs):
+        """Evaluate a batch of points in parallel and log each; returns -scores."""
+        keys = [tuple(float(v) for v in vec) for vec in vecs]
+        todo = list(dict.fromkeys(key for key in keys if key not in seen))
+        if todo:
+            seen.update(zip(todo, evaluate_batch([vec_to_params(key) for key in todo], files,
+                                                 target_profiles, objective,
+                                                 wpm_min, wpm_max, wpm_step, pool)))
+        return [record(vec_to_params(vec), seen[key]) for vec, key in zip(vecs, keys)]
+
+    def plateaued(neg_scores):
+        """Update the plateau counter with a batch; True once patience runs out."""
+        nonlocal plateau_best, no_improve
+        for score in (-y for y in neg_scores):
+            if score >= plateau_best + min_delta:
+                plateau_best = score
+                no_improve = 0
+            else:
+                plateau_best = max(plateau_best, score)
+                no_improve += 1
+        if patience > 0 and no_improve >= patience:
+            print(f"Stopping early: no gain of {min_delta} in the last {no_improve} calls")
+            return True
+        return False
+
+    def record(params, score):
         iteration[0] += 1
-        params = vec_to_params(vec)
-        score = evaluate(params, files, target_profiles, objective, wpm_min, wpm_max, wpm_step)
         elapsed = time.time() - t0
         rate = iteration[0] / elapsed if elapsed > 0 else 0
         eta = (n_calls - iteration[0]) / rate if rate > 0 else 0
@@ -524,23 +803,47 @@ def run_optimisation(
         return -score  # skopt minimises
 
     if USE_BAYES:
-        from skopt import gp_minimize
+        from skopt import Optimizer
         from skopt.space import Real
-        space = [Real(lo, hi, name=name) for name, (lo, hi) in zip(PARAM_NAMES, PARAM_BOUNDS)]
-        # Warm-start with v2 defaults as first point
-        x0 = [V2_DEFAULTS]
-        y0 = [-evaluate(best_params, files, target_profiles, objective, wpm_min, wpm_max, wpm_step)]
-        print(f"v2 baseline score: {-y0[0]:.2f}")
-        result = gp_minimize(
-            objective_fn,
+        from skopt.acquisition import gaussian_ei
+        from skopt.utils import cook_estimator, normalize_dimensions
+        space = normalize_dimensions(
+            [Real(lo, hi, name=name) for name, (lo, hi) in zip(PARAM_NAMES, PARAM_BOUNDS)])
+        # gp_minimize's surrogate and settings, driven through ask/tell so each
+        # round can propose --jobs points at once (constant-liar batching) and
+        # evaluate them together. With --jobs 1 this is gp_minimize's own loop.
+        rng = np.random.RandomState(42)
+        opt = Optimizer(
             space,
-            n_calls=n_calls,
-            x0=x0,
-            y0=y0,
-            random_state=42,
-            n_jobs=1,  # GP itself is single-threaded; parallelism is in evaluation
-            verbose=False,
+            cook_estimator("GP", space=space, noise="gaussian",
+                           random_state=rng.randint(0, np.iinfo(np.int32).max)),
+            n_initial_points=10 + 1,  # 10 random points plus the warm start
+            acq_optimizer="lbfgs",
+            random_state=rng,
+            acq_optimizer_kwargs={"n_points": 10000, "n_restarts_optimizer": 5, "n_jobs": 1},
         )
+        # Warm-start with v2 defaults as first point
+        y0 = -evaluate(best_params, files, target_profiles, objective, wpm_min, wpm_max, wpm_step, pool)
+        print(f"v2 baseline score: {-y0:.2f}")
+        seen[tuple(V2_DEFAULTS)] = -y0
+        result = opt.tell(V2_DEFAULTS, y0)
+        plateaued([y0])
+        while iteration[0] < n_calls:
+            n = min(jobs, n_calls - iteration[0])
+            xs = [opt.ask()] if n == 1 else opt.ask(n_points=n, strategy="cl_min")
+            ys = objective_batch(xs)
+            result = opt.tell(xs, ys)
+            if plateaued(ys):
+                break
+            # Once the GP is fitted, stop if even its chosen next point is
+            # expected to improve on the best by only a negligible amount.
+            # ask() just returns that point here, so the next ask() repeats it.
+            if acq_eps > 0 and opt.models and iteration[0] < n_calls:
+                ei = gaussian_ei(opt.space.transform([opt.ask()]), opt.models[-1],
+                                 y_opt=np.min(opt.yi))[0]
+                if ei < acq_eps * abs(np.min(opt.yi)):
+                    print(f"Stopping early: expected improvement {ei:.2e} below threshold")
+                    break
         best_vec = result.x
         best_params = vec_to_params(best_vec)
         best_score = -result.fun
@@ -548,15 +851,22 @@ def run_optimisation(
         # Random search fallback
         rng = np.random.default_rng(42)
         # Always evaluate v2 baseline first
-        base_score = evaluate(best_params, files, target_profiles, objective, wpm_min, wpm_max, wpm_step)
+        base_score = evaluate(best_params, files, target_profiles, objective, wpm_min, wpm_max, wpm_step, pool)
         print(f"v2 baseline score: {base_score:.2f}")
+        seen[tuple(V2_DEFAULTS)] = base_score
         best_score = base_score
         with open(output_path, "w") as f:
             json.dump({"best_score": best_score, "params": best_params}, f, indent=2)
+        plateaued([-base_score])
+
+        while iteration[0] < n_calls:
+            n = min(jobs, n_calls - iteration[0])
+            ys = objective_batch([[rng.uniform(lo, hi) for lo, hi in PARAM_BOUNDS] for _ in range(n)])
+            if plateaued(ys):
+                break
 
-        for _ in range(n_calls):
-            vec = [rng.uniform(lo, hi) for lo, hi in PARAM_BOUNDS]
-            objective_fn(vec)
+    if pool is not None:
+        pool.shutdown()
 
     print(f"\nOptimisation complete.")
     print(f"Best score: {best_score:.2f}")
@@ -583,7 +893,13 @@ def main():
     parser.add_argument("--wpm-max", type=float, default=20.0)
     parser.add_argument("--wpm-step", type=float, default=0.25)
     parser.add_argument("--output", default="best_params.json")
-    parser.add_argument("--jobs", type=int, default=1, help="Parallel workers (not yet used)")
+    parser.add_argument("--jobs", type=int, default=1, help="Parallel worker processes for file evaluation")
+    parser.add_argument("--patience", type=int, default=0,
+                        help="Stop after this many calls without improvement (0 = never)")
+    parser.add_argument("--min-delta", type=float, default=0.1,
+                        help="Minimum best-score gain that resets the patience counter")
+    parser.add_argument("--acq-eps", type=float, default=0.0,
+                        help="Stop when expected improvement falls below this fraction of best (0 = never)")
     args = parser.parse_args()
 
     target_profiles = [p.strip() for p in args.profiles.split(",")]
@@ -614,6 +930,9 @@ def main():
         wpm_step=args.wpm_step,
         output_path=args.output,
         jobs=args.jobs,
+        patience=args.patience,
+        min_delta=args.min_delta,
+        acq_eps=args.acq_eps,
     )
 
 
@@ -15,7 +15,10 @@ Interface
     )
 
     # Feed one FFT frame (array of bin magnitudes, or single float if tone_bin fixed)
-    events = dec.feed(frame)    # returns list of Event objects
+    events = dec.feed(frame)    # returns a sequence of Event objects
+
+    # Or a block of frames at once (e.g. rows of a 2-D spectrum array)
+    events = dec.feed_batch(frames)
 
     # Steer to a specific frequency (e.g. from UI or second signal detection)
     dec.steer(frequency_hz=850.0)
@@ -49,15 +52,45 @@ Designed to be portable to C++:
     - All state is explicit in the class
     - No numpy in the core state machine (only in the FFT-to-envelope helpers)
     - feed() is O(1) amortised
+
+Until that port, the module type-checks cleanly and can be compiled as is
+with mypyc (pip install mypy; mypyc morse_stream_decoder.py), which drops
+a native extension next to the source that Python imports in its place.
+The numba kernels then stay as the compiled functions.
 """
 
 from __future__ import annotations
 
 import math
+import operator
+import types
+from array import array
 from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from numba import njit as _numba_njit
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+
+def njit(*args, **kwargs):
+    """
+    numba.njit when numba is installed and the target is a Python function,
+    otherwise the identity. numba is optional - the run-length kernels below
+    are plain scalar loops over array.array buffers and run unchanged as
+    Python, and under a mypyc build they are already native code.
+    """
+    def wrap(fn):
+        if not _HAVE_NUMBA or not isinstance(fn, types.FunctionType):
+            return fn
+        return _numba_njit(**kwargs)(fn)
+    if len(args) == 1 and callable(args[0]):
+        return wrap(args[0])
+    return wrap
 
 
 # ---------------------------------------------------------------------------
@@ -77,6 +110,18 @@ MORSE_REVERSE = {
     "-..-.": "/", ".-.-.": "+", "-...-": "=",
 }
 
+# Same table keyed on the symbol as an int bitstream: a leading 1 sentinel,
+# then one bit per element (0 = dit, 1 = dash), so ".-" is 0b101.
+# An empty symbol is 1. Maps straight onto a uint16_t in C++.
+SYM_EMPTY   = 1
+MORSE_TABLE = {int("1" + code.replace(".", "0").replace("-", "1"), 2): ch
+               for code, ch in MORSE_REVERSE.items()}
+
+
+def _decode_symbol(sym: int) -> str:
+    """Character for an int-bitstream symbol, '?' if unknown."""
+    return MORSE_TABLE.get(sym, "?")
+
 
 # ---------------------------------------------------------------------------
 # Events
@@ -90,10 +135,18 @@ class EventKind(Enum):
     STATUS   = auto()
 
 
-@dataclass
+@dataclass(init=False)
 class Event:
+    # One per char/separator, keep them small. Slots are declared by hand
+    # (dataclass(slots=True) needs 3.10), so the payload default lives in
+    # __init__ rather than on the class
+    __slots__ = ("kind", "payload")
     kind: EventKind
-    payload: object = None
+    payload: Any
+
+    def __init__(self, kind: EventKind, payload: Any = None) -> None:
+        self.kind    = kind
+        self.payload = payload
 
     def __str__(self):
         if self.kind == EventKind.CHAR:
@@ -109,6 +162,11 @@ class Event:
         return ""
 
 
+# What feed() returns on the great majority of frames: shared, so quiet
+# frames allocate nothing
+_NO_EVENTS: Tuple[Event, ...] = ()
+
+
 # ---------------------------------------------------------------------------
 # Tunable constants  (candidates for optimiser later)
 # ---------------------------------------------------------------------------
@@ -117,8 +175,10 @@ class Event:
 MIN_ACQUIRE_MARK_RUNS  = 20    # minimum mark runs before attempting WPM estimate
 REESTIMATE_INTERVAL    = 6     # re-run estimator every N frames during acquire
 ACQUIRE_RING_SIZE      = 600   # ~10 seconds at 62fps — long enough for Schmitt to see both states
+RUN_BUF_SIZE           = 500   # completed runs kept for acquisition / replay on lock
 LOCK_THRESHOLD         = 0.65  # histogram alignment fraction to declare lock
                                 # (fraction of mark runs landing on dit or dash)
+WPM_STEP               = 0.5   # WPM grid spacing swept by the estimator
 
 # Schmitt trigger
 SCHMITT_HYST_FRAC      = 0.12  # hysteresis as fraction of envelope dynamic range
@@ -174,101 +234,171 @@ FREQ_TRACK_INTERVAL    = 16    # update centroid every N frames
 # Core run-length helpers (no numpy — portable to C++)
 # ---------------------------------------------------------------------------
 
+@njit(cache=True)
 def _dit_sec(wpm: float) -> float:
     return 1.2 / wpm
 
 
+@njit(cache=True)
+def _runs_kernel(binary, n, out_s, out_l) -> int:
+    """Run-length encode binary[:n] into out_s/out_l. Returns run count."""
+    m   = 0
+    cur = binary[0]
+    run = 1
+    for i in range(1, n):
+        if binary[i] == cur:
+            run += 1
+        else:
+            out_s[m] = cur
+            out_l[m] = run
+            m += 1
+            cur = binary[i]
+            run = 1
+    out_s[m] = cur
+    out_l[m] = run
+    return m + 1
+
+
 def _runs_from_binary(binary: list) -> List[Tuple[int, int]]:
     """Convert binary sequence to (state, length) run-length list."""
     if not binary:
         return []
-    out = []
-    cur = binary[0]
-    n = 1
-    for v in binary[1:]:
-        if v == cur:
-            n += 1
+    n     = len(binary)
+    out_s = array("q", bytes(8 * n))
+    out_l = array("q", bytes(8 * n))
+    m = _runs_kernel(array("q", binary), n, out_s, out_l)
+    return list(zip(out_s[:m], out_l[:m]))
+
+
+@njit(cache=True)
+def _morph_pass(states, lengths, n, min_run, out_s, out_l):
+    """
+    One merge pass over the first n runs into out_s/out_l: each run shorter
+    than min_run is absorbed by its longer neighbour, then adjacent
+    same-state runs are joined. Returns (run count, whether anything merged).
+    """
+    m = 0
+    i = 0
+    changed = False
+    while i < n:
+        length = lengths[i]
+        if length < min_run and n > 1:
+            if i == 0:
+                out_s[m] = states[1]
+                out_l[m] = length + lengths[1]
+                m += 1; i += 2
+            elif i == n - 1 or out_l[m - 1] >= lengths[i + 1]:
+                out_l[m - 1] += length
+                i += 1
+            else:
+                out_s[m] = states[i + 1]
+                out_l[m] = length + lengths[i + 1]
+                m += 1; i += 2
+            changed = True
         else:
-            out.append((cur, n))
-            cur = v
-            n = 1
-    out.append((cur, n))
-    return out
+            out_s[m] = states[i]
+            out_l[m] = length
+            m += 1; i += 1
+
+    # merge adjacent same-state runs (in place)
+    k = 0
+    for j in range(m):
+        if k > 0 and out_s[k - 1] == out_s[j]:
+            out_l[k - 1] += out_l[j]
+        else:
+            out_s[k] = out_s[j]
+            out_l[k] = out_l[j]
+            k += 1
+    return k, changed
+
+
+@njit(cache=True)
+def _morph_kernel(states, lengths, n, min_run, tmp_s, tmp_l) -> int:
+    """Repeat _morph_pass until stable; result left in states/lengths[:n]."""
+    changed = True
+    while changed:
+        n, changed = _morph_pass(states, lengths, n, min_run, tmp_s, tmp_l)
+        for j in range(n):
+            states[j]  = tmp_s[j]
+            lengths[j] = tmp_l[j]
+    return n
 
 
 def _morph_filter(runs: List[Tuple[int, int]], min_run: int) -> List[Tuple[int, int]]:
     """Merge runs shorter than min_run into neighbours."""
     if not runs or min_run <= 1:
         return runs
-    changed = True
-    while changed:
-        changed = False
-        new: List[Tuple[int, int]] = []
-        i = 0
-        while i < len(runs):
-            s, n = runs[i]
-            if n < min_run and len(runs) > 1:
-                if i == 0:
-                    ns, nn = runs[i + 1]
-                    new.append((ns, n + nn)); i += 2
-                elif i == len(runs) - 1:
-                    ps, pn = new[-1]
-                    new[-1] = (ps, pn + n); i += 1
-                else:
-                    ps, pn = new[-1]
-                    ns, nn = runs[i + 1]
-                    if pn >= nn:
-                        new[-1] = (ps, pn + n); i += 1
-                    else:
-                        new.append((ns, n + nn)); i += 2
-                changed = True
-            else:
-                new.append((s, n)); i += 1
-        # merge adjacent same-state runs
-        merged: List[Tuple[int, int]] = []
-        for s, n in new:
-            if merged and merged[-1][0] == s:
-                merged[-1] = (s, merged[-1][1] + n)
-            else:
-                merged.append((s, n))
-        runs = merged
-    return runs
+    n       = len(runs)
+    states  = array("q", [s for s, _ in runs])
+    lengths = array("q", [r for _, r in runs])
+    scratch = bytes(8 * n)
+    n = _morph_kernel(states, lengths, n, min_run, array("q", scratch), array("q", scratch))
+    return list(zip(states[:n], lengths[:n]))
+
+
+@njit(cache=True)
+def _centroid_kernel(frame, lo, hi):
+    """Returns (total, bin-weighted) energy over frame[lo:hi+1]."""
+    total    = 0.0
+    weighted = 0.0
+    for i in range(lo, hi + 1):
+        v = frame[i]
+        total    += v
+        weighted += i * v
+    return total, weighted
+
+
+def _wpm_grid(frame_rate: int, wpm_min: float, wpm_max: float,
+              wpm_step: float) -> Tuple[array, array]:
+    """
+    The estimator's WPM candidates and the unit length in frames for each.
+    WPMs are accumulated step by step, so they match any other walk of the
+    same grid exactly.
+    """
+    wpms        = array("d")
+    unit_frames = array("q")
+    wpm = wpm_min
+    while wpm <= wpm_max + 1e-9:
+        wpms.append(wpm)
+        unit_frames.append(max(1, round(_dit_sec(wpm) * frame_rate)))
+        wpm += wpm_step
+    return wpms, unit_frames
 
 
-def _estimate_wpm(runs: List[Tuple[int, int]],
-                  frame_rate: int,
-                  wpm_min: float, wpm_max: float, wpm_step: float = 0.5
-                  ) -> Tuple[float, float]:
+@njit(cache=True)
+def _estimate_wpm_kernel(states, lengths, n, wpms, unit_frames):
     """
-    Returns (best_wpm, confidence) where confidence is the histogram
-    alignment fraction [0..1] — fraction of mark runs landing near a
-    dit or dash at the best WPM.
+    _estimate_wpm over the first n runs of parallel state/length buffers,
+    scoring the candidates of a _wpm_grid.
     """
-    mark_runs = [n for s, n in runs if s == 1 and n >= 2]
-    if not mark_runs:
-        return wpm_min, 0.0
+    n_marks = 0
+    for j in range(n):
+        if states[j] == 1 and lengths[j] >= 2:
+            n_marks += 1
+    best_wpm = wpms[0] if len(wpms) > 0 else 0.0
+    if n_marks == 0:
+        return best_wpm, 0.0
 
-    total_runs = len(runs)
-    best_wpm   = wpm_min
     best_score = -1e9
     best_conf  = 0.0
 
-    wpm = wpm_min
-    while wpm <= wpm_max + 1e-9:
-        uf = max(1, round(_dit_sec(wpm) * frame_rate))
+    for i in range(len(wpms)):
+        wpm = wpms[i]
+        uf  = unit_frames[i]
 
         # Count runs that fall below 0.5 units (invisible / sub-threshold)
         # A good WPM estimate should leave few runs below this cutoff.
-        sub_thresh = sum(1 for s, n in runs if n / uf < 0.5)
-        sub_frac   = sub_thresh / max(1, total_runs)
-
-        # Mean-error score
+        # Mean-error score over the rest, in the same pass.
+        sub_thresh = 0
         pen = 0.0; tw = 0.0
-        for state, n in runs:
-            units = n / uf
+        for j in range(n):
+            state = states[j]
+            length = lengths[j]
+            units = length / uf
             if units < 0.5:
+                sub_thresh += 1
                 continue
-            weight = min(n, 10 * uf)
+            weight = min(length, 10 * uf)
             if state == 1:
                 err = min(abs(units - 1.0), abs(units - 3.0))
                 w = 1.0
@@ -278,15 +408,20 @@ def _estimate_wpm(runs: List[Tuple[int, int]],
                 else:
                     err = min(abs(units - 1.0), abs(units - 3.0)); w = SPACE_LETTER_WEIGHT
             pen += weight * w * err; tw += weight * w
+        sub_frac = sub_thresh / max(1, n)
 
         if tw <= 1e-9:
-            wpm += wpm_step
             continue
 
         tol = HIST_TOL_FRAC * uf
         dash_f = 3 * uf
-        hits = sum(1 for n in mark_runs if abs(n - uf) <= tol or abs(n - dash_f) <= tol)
-        conf = hits / len(mark_runs)
+        hits = 0
+        for j in range(n):
+            length = lengths[j]
+            if states[j] == 1 and length >= 2:
+                if abs(length - uf) <= tol or abs(length - dash_f) <= tol:
+                    hits += 1
+        conf = hits / n_marks
 
         # Penalise solutions that discard many runs as sub-threshold —
         # this catches false aliases (e.g. 6.5wpm matching 20wpm dashes)
@@ -297,11 +432,26 @@ def _estimate_wpm(runs: List[Tuple[int, int]],
             best_wpm   = wpm
             best_conf  = conf
 
-        wpm += wpm_step
-
     return best_wpm, best_conf
 
 
+def _estimate_wpm(runs: List[Tuple[int, int]],
+                  frame_rate: int,
+                  wpm_min: float, wpm_max: float, wpm_step: float = 0.5
+                  ) -> Tuple[float, float]:
+    """
+    Returns (best_wpm, confidence) where confidence is the histogram
+    alignment fraction [0..1] — fraction of mark runs landing near a
+    dit or dash at the best WPM.
+    """
+    states  = array("q", [s for s, _ in runs])
+    lengths = array("q", [r for _, r in runs])
+    wpms, unit_frames = _wpm_grid(frame_rate, float(wpm_min), float(wpm_max), float(wpm_step))
+    if not wpms:
+        return float(wpm_min), 0.0
+    return _estimate_wpm_kernel(states, lengths, len(runs), wpms, unit_frames)
+
+
 # ---------------------------------------------------------------------------
 # Main streaming decoder
 # ---------------------------------------------------------------------------
@@ -326,6 +476,29 @@ class StreamingMorseDecoder:
     nominal_tone_hz : float — nominal tone frequency for auto-detect centre
     """
 
+    # Every attribute is created in __init__; slots give fixed-offset access
+    # on the per-frame path and no per-instance __dict__
+    __slots__ = (
+        "frame_rate", "wpm_min", "wpm_max", "n_fft_bins", "sample_rate",
+        "nominal_tone_hz", "track_frequency",
+        "_acq_min_run", "_wpm_grid", "_uf_grid", "_wpm_table",
+        "_fixed_tone_bin", "_active_tone_bin",
+        "_env_frames", "_peak_hold", "_peak_low_frames",
+        "_p20_hist", "_p20_ring", "_p20_ring_idx", "_p20_scale", "_p20_total",
+        "_p20_cursor", "_p20_cum_below",
+        "_noise_floor", "_noise_floor_min", "_bin_hist",
+        "_schmitt_state", "_schmitt_lo", "_schmitt_hi", "_schmitt_valid",
+        "_schmitt_frame",
+        "_cur_state", "_cur_len",
+        "_run_states", "_run_lengths", "_run_idx", "_run_count", "_run_marks",
+        "_morph_tmp_s", "_morph_tmp_l",
+        "_binary_hist", "_binary_idx",
+        "_state", "_frames_since_acquire",
+        "_locked_wpm", "_unit_est", "_unit_locked", "_unit_min", "_unit_max",
+        "_current_symbol", "_frames_since_mark",
+        "_freq_bin_est", "_freq_track_ctr",
+    )
+
     def __init__(
         self,
         frame_rate:      int   = 62,
@@ -345,6 +518,19 @@ class StreamingMorseDecoder:
         self.nominal_tone_hz = float(nominal_tone_hz)
         self.track_frequency = bool(track_frequency)
 
+        # Fixed per decoder, so worked out once rather than per estimate/lock:
+        # the coarse acquisition morph threshold (mid-range WPM assumption),
+        # the estimator's WPM grid with each candidate's unit length in
+        # frames, and the PLL unit and sanity bounds for every grid WPM
+        coarse_uf = max(1, round(_dit_sec(0.5 * (self.wpm_min + self.wpm_max)) * self.frame_rate))
+        self._acq_min_run: int = max(2, round(MORPH_THRESH_FRAC * coarse_uf))
+        self._wpm_grid: array
+        self._uf_grid:  array
+        self._wpm_grid, self._uf_grid = _wpm_grid(self.frame_rate, self.wpm_min,
+                                                  self.wpm_max, WPM_STEP)
+        self._wpm_table: Dict[float, Tuple[float, float, float]] = {
+            wpm: self._unit_bounds(wpm) for wpm in self._wpm_grid}
+
         # Fixed or auto tone bin
         self._fixed_tone_bin: Optional[int] = tone_bin
         self._active_tone_bin: Optional[int] = tone_bin  # resolved at first frame
@@ -361,15 +547,19 @@ class StreamingMorseDecoder:
         # Sliding window of P20_HIST_WINDOW frames; one add + one remove per frame.
         # _p20_scale: maps raw mag → bucket index (set on first non-zero frame)
         self._p20_hist:    List[int] = [0] * P20_HIST_BINS
-        self._p20_ring:    deque     = deque(maxlen=P20_HIST_WINDOW)  # bucket indices
+        self._p20_ring:    array     = array("i", bytes(4 * P20_HIST_WINDOW))  # bucket indices
+        self._p20_ring_idx: int      = 0     # next ring slot to write (= oldest once full)
         self._p20_scale:   float     = 0.0   # mag * scale → bucket (0 until calibrated)
         self._p20_total:   int       = 0     # frames in histogram (ramps up to window)
+        # Running percentile cursor: _p20_cum_below = sum(_p20_hist[:_p20_cursor])
+        self._p20_cursor:    int = 0
+        self._p20_cum_below: int = 0
 
         # Noise floor: short-term p20, anchored by long-term minimum
         self._noise_floor:      float = 0.0
         self._noise_floor_min:  float = 0.0
 
-        self._bin_hist:  deque = deque(maxlen=64)   # raw per-bin frames for auto-detect
+        self._bin_hist:  deque = deque(maxlen=64)   # search-window bins per frame, for auto-detect
 
         # Schmitt trigger state
         self._schmitt_state: int   = 0
@@ -382,11 +572,21 @@ class StreamingMorseDecoder:
         self._cur_state:  int = 0
         self._cur_len:    int = 0
 
-        # Completed run ring for acquisition and re-interpretation on lock
-        self._run_buf: deque = deque(maxlen=500)
+        # Completed run ring for acquisition and re-interpretation on lock.
+        # Struct-of-arrays: parallel state (int8) / length (int32) rings with
+        # a write cursor, plus a running count of mark runs held in the ring
+        self._run_states:  array = array("b", bytes(RUN_BUF_SIZE))
+        self._run_lengths: array = array("i", bytes(4 * RUN_BUF_SIZE))
+        self._run_idx:     int   = 0
+        self._run_count:   int   = 0
+        self._run_marks:   int   = 0
+        # Scratch for the acquisition morph filter (same element types)
+        self._morph_tmp_s: array = array("b", bytes(RUN_BUF_SIZE))
+        self._morph_tmp_l: array = array("i", bytes(4 * RUN_BUF_SIZE))
 
         # Binary frame ring (for Schmitt threshold recalculation)
-        self._binary_hist: deque = deque(maxlen=ACQUIRE_RING_SIZE)
+        self._binary_hist: array = array("b", bytes(ACQUIRE_RING_SIZE))
+        self._binary_idx:  int   = 0
 
         # State machine
         self._state: State = State.ACQUIRE
@@ -400,7 +600,7 @@ class StreamingMorseDecoder:
         self._unit_max:      float = 0.0
 
         # Symbol accumulation
-        self._current_symbol: str = ""
+        self._current_symbol: int = SYM_EMPTY   # int bitstream, see MORSE_TABLE
 
         # Lock-loss watchdog: counts frames since last mark run
         self._frames_since_mark: int = 0
@@ -408,23 +608,22 @@ class StreamingMorseDecoder:
         # Frequency drift tracking
         self._freq_bin_est:   float = 0.0   # fractional bin estimate (IIR smoothed)
         self._freq_track_ctr: int   = 0     # frame counter for interval gating
-        self._last_frame = None             # most recent raw frame (for centroid)
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
-    def feed(self, frame) -> List[Event]:
+    def feed(self, frame) -> Sequence[Event]:
         """
         Feed one FFT frame. frame can be:
           - a list/array of bin magnitudes (auto-detect or fixed-bin mode)
           - a single float (pre-selected magnitude, fixed-bin mode)
-        Returns a (possibly empty) list of Event objects.
+        Returns a (possibly empty) sequence of Event objects; treat it as
+        read-only, since the empty result is shared between calls.
         """
         # --- 1. Extract magnitude for our tone bin ---
-        #        Also cache the raw frame for frequency drift tracking.
-        self._last_frame = frame
-        mag = self._extract_magnitude(frame)
+        is_scalar = isinstance(frame, (int, float))
+        mag = float(frame) if is_scalar else self._extract_magnitude(frame)
 
         # --- 2. Update asymmetric AGC (peak-hold + histogram noise floor) ---
         self._env_frames += 1
@@ -445,28 +644,44 @@ class StreamingMorseDecoder:
             self._p20_scale = (P20_HIST_BINS - 1) / (mag * 8.0)  # headroom ×8
 
         if self._p20_scale > 0.0:
+            hist   = self._p20_hist
+            cursor = self._p20_cursor
+
             # Add new sample
             bucket = min(P20_HIST_BINS - 1, int(mag * self._p20_scale))
-            self._p20_ring.append(bucket)
-            self._p20_hist[bucket] += 1
+            ring_idx = self._p20_ring_idx
+            self._p20_ring[ring_idx] = bucket
+            ring_idx = (ring_idx + 1) % P20_HIST_WINDOW
+            self._p20_ring_idx = ring_idx
+            hist[bucket] += 1
             self._p20_total += 1
+            if bucket < cursor:
+                self._p20_cum_below += 1
 
             # Remove oldest sample when window full
-            if len(self._p20_ring) == P20_HIST_WINDOW and self._p20_total > P20_HIST_WINDOW:
-                old = self._p20_ring[0]   # deque[0] is oldest (maxlen ring)
-                self._p20_hist[old] = max(0, self._p20_hist[old] - 1)
+            # (_p20_total only exceeds the window once the ring has wrapped)
+            if self._p20_total > P20_HIST_WINDOW:
+                old = self._p20_ring[ring_idx]   # slot after the newest is oldest
+                if hist[old] > 0:
+                    hist[old] -= 1
+                    if old < cursor:
+                        self._p20_cum_below -= 1
                 self._p20_total = P20_HIST_WINDOW
 
-            # Read p20: walk buckets until cumulative count >= 20% of total
+            # Read p20: first bucket where the cumulative count reaches 20% of
+            # total. The cursor only moves as far as the one add/remove above
+            # shifted the answer, instead of re-walking every bucket.
             target = max(1, int(self._p20_total * P20_PERCENTILE))
-            cum = 0
-            p20_bucket = 0
-            for b in range(P20_HIST_BINS):
-                cum += self._p20_hist[b]
-                if cum >= target:
-                    p20_bucket = b
-                    break
-            short_term = p20_bucket / (self._p20_scale + 1e-12)
+            cum    = self._p20_cum_below
+            while cursor > 0 and cum >= target:
+                cursor -= 1
+                cum    -= hist[cursor]
+            while cum + hist[cursor] < target and cursor < P20_HIST_BINS - 1:
+                cum    += hist[cursor]
+                cursor += 1
+            self._p20_cursor    = cursor
+            self._p20_cum_below = cum
+            short_term = cursor / (self._p20_scale + 1e-12)
 
             # Anchor: slow upward ratchet — prevents collapse during deep QSB fades
             if short_term > self._noise_floor_min:
@@ -480,24 +695,35 @@ class StreamingMorseDecoder:
 
         # --- 4. Schmitt trigger → binary ---
         if not self._schmitt_valid:
-            return []   # not enough history yet
+            return _NO_EVENTS   # not enough history yet
 
         bit = self._schmitt_step(mag)
-        self._binary_hist.append(bit)
+        self._binary_hist[self._binary_idx] = bit
+        self._binary_idx = (self._binary_idx + 1) % ACQUIRE_RING_SIZE
 
         # --- 5. Run-length tracking ---
-        events: List[Event] = []
-        run_complete = self._update_run(bit)
+        #        Inlined: the same-state branch runs on almost every frame.
+        #        A list is only built once a run completes.
+        events: Sequence[Event] = _NO_EVENTS
+        run_state = self._cur_state
+        if bit == run_state:
+            self._cur_len += 1
+            run_len = 0
+        else:
+            run_len = self._cur_len
+            self._cur_state = bit
+            self._cur_len   = 1
 
-        if run_complete is not None:
-            run_state, run_len = run_complete
-            self._run_buf.append(run_complete)
+        if run_len > 0:
+            self._push_run(run_state, run_len)
             self._frames_since_acquire += 1
 
             if self._state == State.ACQUIRE:
-                events.extend(self._acquire_step())
+                events = self._acquire_step()
             else:
-                events.extend(self._track_step(run_state, run_len))
+                tracked: List[Event] = []
+                self._track_step(run_state, run_len, tracked)
+                events = tracked
 
         # --- 6. Lock-loss watchdog ---
         if self._state == State.LOCKED:
@@ -507,15 +733,15 @@ class StreamingMorseDecoder:
                 self._frames_since_mark += 1
             lost_timeout = int(LOST_TIMEOUT_DITS * self._unit_est)
             if self._frames_since_mark > lost_timeout:
-                events.extend(self._declare_lost("timeout"))
+                events = [*events, *self._declare_lost("timeout")]
             elif not (self._unit_min <= self._unit_est <= self._unit_max):
-                events.extend(self._declare_lost("PLL drift"))
+                events = [*events, *self._declare_lost("PLL drift")]
 
         # --- 7. Frequency drift tracking (array frames only, both states) ---
         if (self.track_frequency
                 and self._active_tone_bin is not None
                 and self._schmitt_valid
-                and not isinstance(frame, (int, float))):
+                and not is_scalar):
             self._freq_track_ctr += 1
             if self._freq_track_ctr >= FREQ_TRACK_INTERVAL:
                 self._freq_track_ctr = 0
@@ -523,6 +749,20 @@ class StreamingMorseDecoder:
 
         return events
 
+    def feed_batch(self, frames) -> List[Event]:
+        """
+        Feed a block of frames in order (rows of a 2-D array, or any
+        iterable of frames feed() accepts). Returns the block's events in
+        order; same result as calling feed() per frame.
+        """
+        events: List[Event] = []
+        feed = self.feed
+        for frame in frames:
+            out = feed(frame)
+            if out:
+                events.extend(out)
+        return events
+
     def steer(self, frequency_hz: Optional[float]) -> List[Event]:
         """
         Steer decoder to a specific frequency bin.
@@ -556,43 +796,39 @@ class StreamingMorseDecoder:
     # ------------------------------------------------------------------
 
     def _extract_magnitude(self, frame) -> float:
-        """Pull magnitude for the active tone bin from a frame."""
-        # Scalar — already the magnitude
-        if isinstance(frame, (int, float)):
-            return float(frame)
-
-        arr = frame  # list or numpy array
-
-        # Auto-detect: on first call, or if not yet resolved
-        if self._active_tone_bin is None:
-            self._bin_hist.append(arr)
-            if len(self._bin_hist) >= 32:
-                self._active_tone_bin = self._auto_detect_bin()
-                self._freq_bin_est = float(self._active_tone_bin)
-            # Until detected, use nominal bin
-            return float(arr[self._hz_to_bin(self.nominal_tone_hz)])
-
-        return float(arr[self._active_tone_bin])
+        """Pull magnitude for the active tone bin from an array frame."""
+        b = self._active_tone_bin
+        if b is not None:
+            return float(frame[b])
+
+        # Auto-detect: buffer only the search window of each frame, as
+        # floats, so no caller's frame (or the spectrum block behind an
+        # ndarray row) is kept alive by the history
+        lo, hi = self._detect_window()
+        seg = frame[lo:hi + 1]
+        self._bin_hist.append(seg.tolist() if hasattr(seg, "tolist") else list(seg))
+        if len(self._bin_hist) >= 32:
+            self._active_tone_bin = self._auto_detect_bin()
+            self._freq_bin_est = float(self._active_tone_bin)
+        # Until detected, use nominal bin
+        return float(frame[self._hz_to_bin(self.nominal_tone_hz)])
+
+    def _detect_window(self) -> Tuple[int, int]:
+        """(lo, hi) bins of the auto-detect search window."""
+        centre = self._hz_to_bin(self.nominal_tone_hz)
+        span   = max(1, int(self.n_fft_bins * AUTO_DETECT_SPAN_FRAC))
+        return max(1, centre - span), min(self.n_fft_bins - 1, centre + span)
 
     def _auto_detect_bin(self) -> int:
         """
         Find the tone bin with highest peak magnitude in the search window.
         Pure arithmetic — no numpy.
         """
-        centre = self._hz_to_bin(self.nominal_tone_hz)
-        span   = max(1, int(self.n_fft_bins * AUTO_DETECT_SPAN_FRAC))
-        lo     = max(1, centre - span)
-        hi     = min(self.n_fft_bins - 1, centre + span)
-
-        # For each bin in window, find its max across all buffered frames
-        best_bin = lo
-        best_val = -1.0
-        for b in range(lo, hi + 1):
-            peak = max(float(f[b]) for f in self._bin_hist)
-            if peak > best_val:
-                best_val = peak
-                best_bin = b
-        return best_bin
+        # For each bin in window, find its max across all buffered windows,
+        # reducing column-wise with builtins
+        lo, _ = self._detect_window()
+        peaks = list(map(max, zip(*self._bin_hist)))
+        return lo + max(range(len(peaks)), key=peaks.__getitem__)
 
     def _hz_to_bin(self, hz: float) -> int:
         bin_hz = self.sample_rate / (2.0 * self.n_fft_bins)
@@ -629,10 +865,10 @@ class StreamingMorseDecoder:
         self._schmitt_valid = True
 
     def _schmitt_step(self, val: float) -> int:
-        if self._schmitt_state == 0 and val >= self._schmitt_hi:
-            self._schmitt_state = 1
-        elif self._schmitt_state == 1 and val <= self._schmitt_lo:
-            self._schmitt_state = 0
+        # Branchless form of "0→1 at >= hi, 1→0 at <= lo" (valid since lo < hi).
+        # Per frame only: lo/hi move every 8 frames with the AGC state that
+        # each frame updates, so a buffer cannot be thresholded ahead of it
+        self._schmitt_state = (self._schmitt_state | (val >= self._schmitt_hi)) & (val > self._schmitt_lo)
         return self._schmitt_state
 
     # ------------------------------------------------------------------
@@ -645,16 +881,24 @@ class StreamingMorseDecoder:
         active bin, nudged toward _active_tone_bin with a slow IIR.
         Pure arithmetic — no numpy.
         """
-        b  = self._active_tone_bin
+        b = self._active_tone_bin
+        if b is None:
+            return  # caller only tracks once a bin is resolved
         lo = max(0, b - FREQ_TRACK_SPAN)
         hi = min(self.n_fft_bins - 1, b + FREQ_TRACK_SPAN)
 
-        total    = 0.0
-        weighted = 0.0
-        for i in range(lo, hi + 1):
-            v = float(frame[i])
-            total    += v
-            weighted += i * v
+        if _HAVE_NUMBA and not isinstance(frame, list):
+            # Array frames (stream_from_wav): native loop over the window
+            total, weighted = _centroid_kernel(frame, lo, hi)
+        else:
+            # One slice of the window, then builtin reductions over it rather
+            # than indexing the frame bin by bin. ndarray frames convert the
+            # slice to floats in one tolist() call (no numpy import needed);
+            # per-element float() on numpy scalars costs more than the loop saved.
+            seg      = frame[lo:hi + 1]
+            window   = seg.tolist() if hasattr(seg, "tolist") else list(map(float, seg))
+            total    = sum(window)
+            weighted = sum(map(operator.mul, range(lo, hi + 1), window))
 
         if total < 1e-9:
             return  # silence — don't update
@@ -684,59 +928,58 @@ class StreamingMorseDecoder:
     # Internal: run-length tracking
     # ------------------------------------------------------------------
 
-    def _update_run(self, bit: int) -> Optional[Tuple[int, int]]:
-        """
-        Update in-progress run. Returns completed (state, length) or None.
-        """
-        if bit == self._cur_state:
-            self._cur_len += 1
-            return None
+    def _push_run(self, state: int, length: int) -> None:
+        """Append a completed run to the run ring, overwriting the oldest when full."""
+        i = self._run_idx
+        if self._run_count == RUN_BUF_SIZE:
+            self._run_marks -= self._run_states[i]
         else:
-            if self._cur_len > 0:
-                completed = (self._cur_state, self._cur_len)
-            else:
-                completed = None
-            self._cur_state = bit
-            self._cur_len   = 1
-            return completed
+            self._run_count += 1
+        self._run_states[i]  = state
+        self._run_lengths[i] = length
+        self._run_marks     += state
+        self._run_idx        = (i + 1) % RUN_BUF_SIZE
+
+    def _ordered_runs(self) -> Tuple[array, array]:
+        """Copies of the run ring's (states, lengths), oldest first."""
+        i, n = self._run_idx, self._run_count
+        if n < RUN_BUF_SIZE:
+            return self._run_states[:n], self._run_lengths[:n]
+        return (self._run_states[i:] + self._run_states[:i],
+                self._run_lengths[i:] + self._run_lengths[:i])
 
     # ------------------------------------------------------------------
     # Internal: acquisition
     # ------------------------------------------------------------------
 
-    def _acquire_step(self) -> List[Event]:
-        events: List[Event] = []
-
-        mark_count = sum(1 for s, n in self._run_buf if s == 1)
-        if mark_count < MIN_ACQUIRE_MARK_RUNS:
-            return events
-
+    def _acquire_step(self) -> Sequence[Event]:
+        # Cheapest, most often true gate first: only every Nth run re-estimates
         if self._frames_since_acquire % REESTIMATE_INTERVAL != 0:
-            return events
+            return _NO_EVENTS
 
-        runs = list(self._run_buf)
+        if self._run_marks < MIN_ACQUIRE_MARK_RUNS:
+            return _NO_EVENTS
+
+        states, lengths = self._ordered_runs()
         # Coarse morph filter with mid-range WPM assumption
-        coarse_uf = max(1, round(_dit_sec(0.5 * (self.wpm_min + self.wpm_max)) * self.frame_rate))
-        min_run   = max(2, round(MORPH_THRESH_FRAC * coarse_uf))
-        runs      = _morph_filter(runs, min_run)
+        n    = _morph_kernel(states, lengths, len(states), self._acq_min_run,
+                             self._morph_tmp_s, self._morph_tmp_l)
 
-        wpm, conf = _estimate_wpm(runs, self.frame_rate, self.wpm_min, self.wpm_max)
+        wpm, conf = _estimate_wpm_kernel(states, lengths, n, self._wpm_grid, self._uf_grid)
 
         if conf >= LOCK_THRESHOLD:
-            events.extend(self._declare_locked(wpm))
-
-        return events
+            return self._declare_locked(wpm)
+        return _NO_EVENTS
 
     # ------------------------------------------------------------------
     # Internal: tracking (LOCKED state)
     # ------------------------------------------------------------------
 
-    def _track_step(self, run_state: int, run_len: int) -> List[Event]:
-        events: List[Event] = []
-
+    def _track_step(self, run_state: int, run_len: int, events: List[Event]) -> None:
+        """Decode one completed run, appending any resulting events to events."""
         uf = self._unit_est
         if uf <= 1e-6:
-            return events
+            return
 
         units_f = run_len / uf
         units   = max(1, round(units_f))
@@ -744,7 +987,7 @@ class StreamingMorseDecoder:
         if run_state == 1:
             # Mark run → dit or dash
             is_dash = units >= 2
-            self._current_symbol += "-" if is_dash else "."
+            self._current_symbol = (self._current_symbol << 1) | is_dash
             target = 3.0 if is_dash else 1.0
             # PLL update
             obs = run_len / target
@@ -754,12 +997,12 @@ class StreamingMorseDecoder:
         else:
             # Space run → inter-element, letter gap, or word gap
             if units_f >= WORD_GAP_THR:
-                if self._current_symbol:
+                if self._current_symbol != SYM_EMPTY:
                     events.extend(self._emit_symbol())
                 events.append(Event(EventKind.WORD_SEP, " "))
                 # Don't steer PLL from word gaps
             elif units >= 3:
-                if self._current_symbol:
+                if self._current_symbol != SYM_EMPTY:
                     events.extend(self._emit_symbol())
                 target = 3.0
                 obs = run_len / target
@@ -772,27 +1015,30 @@ class StreamingMorseDecoder:
         # Clamp PLL
         self._unit_est = max(self._unit_min, min(self._unit_max, self._unit_est))
 
-        return events
-
     def _emit_symbol(self) -> List[Event]:
         sym = self._current_symbol
-        self._current_symbol = ""
-        ch = MORSE_REVERSE.get(sym, "?")
-        return [Event(EventKind.CHAR, ch)]
+        self._current_symbol = SYM_EMPTY
+        return [Event(EventKind.CHAR, _decode_symbol(sym))]
 
     # ------------------------------------------------------------------
     # Internal: state transitions
     # ------------------------------------------------------------------
 
+    def _unit_bounds(self, wpm: float) -> Tuple[float, float, float]:
+        """(unit frames, PLL unit min, PLL unit max) at the given WPM."""
+        uf = _dit_sec(wpm) * self.frame_rate
+        return uf, PLL_LO_FRAC * uf, PLL_HI_FRAC * uf
+
     def _declare_locked(self, wpm: float) -> List[Event]:
         self._state       = State.LOCKED
         self._locked_wpm  = wpm
-        uf                = _dit_sec(wpm) * self.frame_rate
+        bounds            = self._wpm_table.get(wpm)
+        if bounds is None:
+            bounds = self._unit_bounds(wpm)
+        uf, self._unit_min, self._unit_max = bounds
         self._unit_est    = uf
         self._unit_locked = uf
-        self._unit_min    = PLL_LO_FRAC * uf
-        self._unit_max    = PLL_HI_FRAC * uf
-        self._current_symbol    = ""
+        self._current_symbol    = SYM_EMPTY
         self._frames_since_mark = 0
         self._freq_bin_est      = float(self._active_tone_bin or 0)
         self._freq_track_ctr    = 0
@@ -800,11 +1046,14 @@ class StreamingMorseDecoder:
         events: List[Event] = [Event(EventKind.LOCKED, wpm)]
 
         # Re-interpret the acquisition runs through the tracker.
-        # The runs are already correctly binarised and ordered in _run_buf —
+        # The runs are already correctly binarised in the run ring —
         # we just route them through _track_step instead of discarding them.
-        # Zero extra memory, zero extra processing during acquisition.
-        for run_state, run_len in self._run_buf:
-            events.extend(self._track_step(run_state, run_len))
+        # Zero extra processing during acquisition. Acquisition itself only
+        # estimates WPM, so this replay is the one decode of these runs; it
+        # appends straight into events rather than building a list per run.
+        track = self._track_step
+        for run_state, run_len in zip(*self._ordered_runs()):
+            track(run_state, run_len, events)
 
         return events
 
@@ -816,8 +1065,10 @@ class StreamingMorseDecoder:
     def _reset_to_acquire(self):
         self._state               = State.ACQUIRE
         self._frames_since_acquire = 0
-        self._run_buf.clear()
-        self._current_symbol      = ""
+        self._run_idx             = 0
+        self._run_count           = 0
+        self._run_marks           = 0
+        self._current_symbol      = SYM_EMPTY
         self._frames_since_mark   = 0
         self._cur_state           = 0
         self._cur_len             = 0
@@ -844,7 +1095,16 @@ def stream_from_wav(
     has zero numpy dependency and is portable to C++.
     """
     import numpy as np
+    import sys
     import wave as wavemod
+    try:
+        # scipy's pocketfft transforms float32 natively and can split a
+        # batch across cores; numpy's rfft is the fallback
+        from scipy.fft import rfft as _rfft  # type: ignore[import-untyped]
+        rfft_kw: Dict[str, Any] = {"workers": -1, "overwrite_x": True}
+    except ImportError:
+        _rfft = np.fft.rfft
+        rfft_kw = {}
     with wavemod.open(wav_path, "rb") as wf:
         sr      = wf.getframerate()
         n_ch    = wf.getnchannels()
@@ -878,19 +1138,30 @@ def stream_from_wav(
     import time as _time
     t0 = _time.time()
 
-    for i in range(0, len(data) - fft_size, hop):
-        seg  = data[i:i + fft_size] * window
-        spec = np.abs(np.fft.rfft(seg, n=fft_size))  # fft_size//2 + 1 bins
-        events = dec.feed(spec[:n_bins])              # positive-freq bins only
+    # STFT in blocks of hops: one windowed copy and one batched rfft per
+    # block instead of per frame, with the block size bounding memory.
+    # Frame starts are range(0, len(data) - fft_size, hop) as before.
+    # The decoder copies what it keeps of a frame (the auto-detect search
+    # window, as floats), so nothing references a block once it is fed.
+    block_frames = 1024
+    if len(data) > fft_size:
+        frames = np.lib.stride_tricks.sliding_window_view(data, fft_size)[:len(data) - fft_size:hop]
+    else:
+        frames = np.empty((0, fft_size), dtype=np.float32)
+
+    # Verbose text is written once per block rather than flushed per event.
+    for b in range(0, len(frames), block_frames):
+        block = frames[b:b + block_frames] * window               # fresh, so overwritable
+        specs = np.abs(_rfft(block, n=fft_size, axis=1, **rfft_kw))  # fft_size//2 + 1 bins
+        events = dec.feed_batch(specs[:, :n_bins])                # positive-freq bins only
         all_events.extend(events)
-        if verbose:
-            for ev in events:
-                print(str(ev), end="", flush=True)
+        if verbose and events:
+            sys.stdout.write("".join(map(str, events)))
+            sys.stdout.flush()
 
     # Flush any in-progress symbol at end of stream
-    if dec._current_symbol:
-        sym = dec._current_symbol
-        ch  = MORSE_REVERSE.get(sym, "?")
+    if dec._current_symbol != SYM_EMPTY:
+        ch = _decode_symbol(dec._current_symbol)
         all_events.append(Event(EventKind.CHAR, ch))
         if verbose:
             print(ch, end="", flush=True)